@@ -0,0 +1,104 @@
+# !python3
+# coding=utf-8
+
+"""
+Shared asset manager for the maze runner game.
+
+Every image is decoded once and kept converted to the display format,
+and every short sound is decoded once. Sprites share those surfaces
+instead of each owning a decoded copy.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import time
+
+import pygame
+
+
+# ------------------ Class Definition ------------------ #
+
+class AssetManager(object):
+    """
+    cache of decoded images and sounds, keyed by path
+    """
+
+    def __init__(self):
+        """
+        constructor init
+        """
+        self.images = {}        # (path, alpha) -> Surface
+        self.sounds = {}        # path -> Sound
+        self.load_times = {}    # path -> seconds spent loading it
+        self._raw = set()       # image keys loaded before the display
+
+    def image(self, path, alpha=False):
+        """
+        the image at path, converted to the display format once a display
+        is set (convert_alpha when alpha is True)
+        @param path: image file path
+        @param alpha: keep per-pixel alpha
+        @return: the shared Surface, do not draw on it
+        """
+        key = (path, alpha)
+        surface = self.images.get(key)
+        if surface is not None and key not in self._raw:
+            return surface
+
+        time_start = time.perf_counter()
+        if surface is None:
+            surface = pygame.image.load(path)
+        if pygame.display.get_surface() is None:
+            self._raw.add(key)  # convert once a display exists
+        else:
+            surface = surface.convert_alpha() if alpha else surface.convert()
+            self._raw.discard(key)
+        self.images[key] = surface
+        self.load_times[path] = self.load_times.get(path, 0.0) \
+            + time.perf_counter() - time_start
+        return surface
+
+    def sound(self, path):
+        """
+        the sound at path, None while the mixer is not initialized
+        @param path: sound file path
+        @return: the shared pygame.mixer.Sound
+        """
+        sound = self.sounds.get(path)
+        if sound is None and pygame.mixer.get_init():
+            time_start = time.perf_counter()
+            sound = pygame.mixer.Sound(path)
+            self.sounds[path] = sound
+            self.load_times[path] = time.perf_counter() - time_start
+        return sound
+
+    def preload(self, images=(), alpha_images=(), sounds=()):
+        """
+        load assets ahead of the first frame that needs them
+        @param images: image paths to convert()
+        @param alpha_images: image paths to convert_alpha()
+        @param sounds: sound paths
+        @return: seconds spent, see load_times for each path
+        """
+        time_start = time.perf_counter()
+        for path in images:
+            self.image(path)
+        for path in alpha_images:
+            self.image(path, alpha=True)
+        for path in sounds:
+            self.sound(path)
+        return time.perf_counter() - time_start
+
+    def clear(self):
+        """
+        drop every cached asset, needed after pygame.quit
+        """
+        self.images.clear()
+        self.sounds.clear()
+        self.load_times.clear()
+        self._raw.clear()
+
+
+# ------------------ Global Variables Definition ------------------ #
+assets = AssetManager()     # the manager shared by the whole game
@@ -0,0 +1,163 @@
+# !python3
+# coding=utf-8
+
+"""
+Audio manager of the maze runner game.
+
+Short effects and the end-of-game tracks are decoded into
+pygame.mixer.Sound objects on loader threads, ahead of the moment they
+are played. Effects play on any free mixer channel, so they never stop
+the background music, which streams through pygame.mixer.music. Tracks
+play on two reserved channels taken in turn, so they crossfade with
+what is playing: the old music fades out while the new track fades in,
+and nothing waits for either. A track asked for before it is decoded
+starts once it is.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import time
+
+import pygame
+
+from assets import assets as shared_assets
+from startup import Loader
+
+# ------------------ Global Variables Definition ------------------ #
+TRACK_CHANNELS = (0, 1)     # reserved for tracks, effects use the others
+CROSSFADE_MS = 500
+
+
+# ------------------ Class Definition ------------------ #
+
+class AudioManager(object):
+    """
+    effects and music tracks decoded in the background, played without
+    blocking
+    """
+
+    def __init__(self, asset_manager=shared_assets):
+        """
+        constructor init
+        @param asset_manager: the AssetManager keeping the decoded sounds
+        """
+        self.assets = asset_manager
+        self.loader = Loader()
+        self.track = None       # path of the track fading in or playing
+        self.deck = 0           # index of the track channel of self.track
+        self.pending = None     # (path, fade_ms, loops) waiting to decode
+        self.effect_starts = {}     # effect channel index -> start time
+
+    def preload(self, paths):
+        """
+        decode sounds on loader threads, the paths already decoded or
+        decoding are skipped
+        @param paths: sound file paths
+        """
+        for path in paths:
+            if path not in self.assets.sounds \
+                    and path not in self.loader.threads:
+                self.loader.start(path, self.assets.sound, path)
+
+    def ready(self, path):
+        """
+        @return: the decoded Sound of path, None while it is decoding or
+                 without a mixer
+        """
+        if path in self.loader.threads and not self.loader.done(path):
+            return None     # the dict may be written by the thread
+        return self.assets.sounds.get(path)
+
+    def play_effect(self, path, volume=1.0):
+        """
+        play a short sound over the music, dropped if not decoded yet
+        @param path: sound file path, preloaded
+        @param volume: 0 to 1
+        @return: the Channel playing it, or None
+        """
+        sound = self.ready(path)
+        if sound is None:
+            self.preload([path])    # the next one will play
+            return None
+        channel = self._effect_channel()
+        if channel is None:
+            return None     # the mixer has no channel besides the tracks
+        channel.set_volume(volume)
+        channel.play(sound)
+        return channel
+
+    def crossfade(self, path, fade_ms=CROSSFADE_MS, loops=0):
+        """
+        fade out the music and the current track, fade in a track
+        @param path: sound file path of the new track
+        @param fade_ms: length of the fades in milliseconds
+        @param loops: repeats of the track, -1 for ever
+        """
+        if pygame.mixer.get_init():
+            pygame.mixer.music.fadeout(fade_ms)
+            self._reserve()
+            pygame.mixer.Channel(TRACK_CHANNELS[self.deck]).fadeout(fade_ms)
+        self.track = None
+        self.deck = (self.deck + 1) % len(TRACK_CHANNELS)
+        self.pending = (path, fade_ms, loops)
+        self.preload([path])
+        self.update()
+
+    def update(self):
+        """
+        start the pending track once it is decoded, call every frame
+        """
+        if self.pending is None:
+            return
+        path, fade_ms, loops = self.pending
+        if path in self.loader.threads and not self.loader.done(path):
+            return
+        self.pending = None
+        sound = self.assets.sounds.get(path)
+        if sound is None:
+            return  # no mixer, or the file could not be decoded
+        self._reserve()
+        pygame.mixer.Channel(TRACK_CHANNELS[self.deck]).play(
+            sound, loops, fade_ms=fade_ms)
+        self.track = path
+
+    def stop(self):
+        """
+        stop every sound and drop the pending track, before pygame.quit
+        """
+        self.pending = None
+        self.track = None
+        self.effect_starts.clear()
+        if pygame.mixer.get_init():
+            pygame.mixer.stop()
+            pygame.mixer.music.stop()
+        self.loader.wait()  # pygame must outlive the loader threads
+        self.loader = Loader()
+
+    def _effect_channel(self):
+        """
+        a channel for an effect, never a track channel: an idle one, else
+        the one whose effect started first
+        @return: the Channel, None if there is none but the tracks
+        """
+        self._reserve()
+        first = len(TRACK_CHANNELS)
+        indexes = range(first, pygame.mixer.get_num_channels())
+        if not indexes:
+            return None
+        index = next((index for index in indexes
+                      if not pygame.mixer.Channel(index).get_busy()), None)
+        if index is None:
+            index = min(indexes,
+                        key=lambda index: self.effect_starts.get(index, 0.0))
+        self.effect_starts[index] = time.perf_counter()
+        return pygame.mixer.Channel(index)
+
+    @staticmethod
+    def _reserve():
+        pygame.mixer.set_reserved(max(TRACK_CHANNELS) + 1)
+
+
+# ------------------ Global Variables Definition ------------------ #
+audio = AudioManager()     # the manager shared by the whole game
@@ -0,0 +1,164 @@
+# !python3
+# coding=utf-8
+
+"""
+Batch maze generation for level packs and tests.
+
+Mazes are generated in worker processes, several per task so the
+inter-process traffic stays small next to the carving. Every worker sends
+back compact maze files (see mazefile.py), which are written to disk as
+soon as their task completes. Every maze has its own seed, so a batch can
+be regenerated maze by maze. Nothing here imports pygame.
+
+usage: python batch.py out_dir [--count 1000] [--rows 100] [--cols 100]
+                       [--algorithm dfs] [--seed 0] [--workers 4]
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import argparse
+import collections
+import concurrent.futures
+import os
+import time
+
+from engine import new_game
+from mazefile import dumps, teacher_cells, write
+
+# ------------------ Global Variables Definition ------------------ #
+TASKS_PER_WORKER = 8    # tasks queued per worker, smooths uneven tasks
+MAX_TASK_SIZE = 64      # mazes per task at most
+
+# throughput of a finished batch
+BatchReport = collections.namedtuple(
+    'BatchReport', ['count', 'seconds', 'mazes_per_sec', 'cells_per_sec',
+                    'bytes'])
+
+
+# ------------------ Function Definition ------------------ #
+def maze_name(index):
+    return "maze_%06d.maze" % index
+
+
+def _generate_task(jobs, rows, cols, algorithm, teachers):
+    """
+    worker side, generate a few mazes
+    @param jobs: list of (index, seed)
+    @return: list of (index, seed, maze file bytes)
+    """
+    results = []
+    for index, seed in jobs:
+        # the maze and the distance fields of its placement are freed
+        # with the state, a long-lived worker keeps none of them
+        state = new_game(rows, cols, seed, teachers, algorithm)
+        results.append((index, seed,
+                        dumps(state.grid, teacher_cells(state), seed)))
+    return results
+
+
+def iter_batch(rows, cols, seeds, algorithm="dfs", teachers=15,
+               workers=None, task_size=None):
+    """
+    generate mazes in a process pool, in completion order
+    @param rows: grid rows
+    @param cols: grid cols
+    @param seeds: int seed of every maze, maze i uses seeds[i]
+    @param algorithm: generator name, see generators.GENERATORS
+    @param teachers: teachers on every maze, on its chokepoints, see
+                     placement.choose_teacher_cells
+    @param workers: worker processes, one per core if None
+    @param task_size: mazes per task, picked from the batch size if None
+    @return: generator of (index, seed, maze file bytes)
+    """
+    seeds = list(seeds)
+    workers = workers or os.cpu_count() or 1
+    if task_size is None:
+        task_size = min(max(len(seeds) // (workers * TASKS_PER_WORKER), 1),
+                        MAX_TASK_SIZE)
+    jobs = list(enumerate(seeds))
+    tasks = (jobs[start:start + task_size]
+             for start in range(0, len(jobs), task_size))
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        # only a few tasks in flight, so results never pile up in memory
+        pending = set()
+        while True:
+            for task in tasks:
+                pending.add(executor.submit(_generate_task, task, rows,
+                                            cols, algorithm, teachers))
+                if len(pending) >= workers * TASKS_PER_WORKER:
+                    break
+            if not pending:
+                break
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                for result in future.result():
+                    yield result
+
+
+def generate_batch(out_dir, count, rows, cols, algorithm="dfs", seed=0,
+                   seeds=None, teachers=15, workers=None, task_size=None):
+    """
+    generate mazes in a process pool and write them to out_dir as they
+    complete, maze i goes to maze_name(i)
+    @param out_dir: output directory, created if missing
+    @param count: number of mazes, ignored when seeds is given
+    @param rows: grid rows
+    @param cols: grid cols
+    @param algorithm: generator name, see generators.GENERATORS
+    @param seed: maze i uses seed + i when seeds is None
+    @param seeds: int seed of every maze
+    @param teachers: teachers on every maze, on its chokepoints, see
+                     placement.choose_teacher_cells
+    @param workers: worker processes, one per core if None
+    @param task_size: mazes per task, picked from the batch size if None
+    @return: the BatchReport
+    """
+    if seeds is None:
+        seeds = range(seed, seed + count)
+    seeds = list(seeds)
+    os.makedirs(out_dir, exist_ok=True)
+
+    written = 0
+    time_start = time.perf_counter()
+    for index, _, data in iter_batch(rows, cols, seeds, algorithm, teachers,
+                                     workers, task_size):
+        write(os.path.join(out_dir, maze_name(index)), data)
+        written += len(data)
+    seconds = time.perf_counter() - time_start
+
+    rate = len(seeds) / seconds if seconds else float('inf')
+    return BatchReport(len(seeds), seconds, rate, rate * rows * cols,
+                       written)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=12)
+    parser.add_argument("--cols", type=int, default=16)
+    parser.add_argument("--algorithm", default="dfs")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="maze i uses seed + i")
+    parser.add_argument("--teachers", type=int, default=15,
+                        help="teachers on every maze, placed on its "
+                             "chokepoints")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--task-size", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    report = generate_batch(args.out_dir, args.count, args.rows, args.cols,
+                            args.algorithm, args.seed,
+                            teachers=args.teachers, workers=args.workers,
+                            task_size=args.task_size)
+    print("%d mazes %dx%d in %.2f s: %.1f mazes/s, %.0f cells/s, %d bytes"
+          % (report.count, args.rows, args.cols, report.seconds,
+             report.mazes_per_sec, report.cells_per_sec, report.bytes))
+
+
+# ------------------ Debug Statement ------------------ #
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,453 @@
+# !python3
+# coding=utf-8
+
+"""
+Benchmarks for the hot paths of the maze runner game.
+
+Times maze generation, the Maze helpers, player collision and one frame
+of the main loop drawn to an offscreen surface, for several grid sizes.
+Reports ops/sec and peak Python memory, and writes the results to a JSON
+file that can be compared with the run of another commit. Runs on the
+SDL dummy video driver, no display needed.
+
+usage: python bench.py [--sizes 12x16,500x500] [--output bench.json]
+                       [--compare old.json]
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame   # noqa: E402, the SDL drivers must be chosen first
+
+import maze     # noqa: E402
+from assets import assets   # noqa: E402
+from camera import Camera   # noqa: E402
+from collision import GridCollider  # noqa: E402
+from editing import toggle_wall    # noqa: E402
+from engine import GameState    # noqa: E402
+from env import ACTIONS, MazeEnv, VecMazeEnv   # noqa: E402
+from generators import GENERATORS, generate     # noqa: E402
+from grid import MazeGrid   # noqa: E402
+from placement import place_teachers    # noqa: E402
+from profiler import FrameProfiler  # noqa: E402
+from render import maze_image  # noqa: E402
+from solver import DistanceField, distance_field    # noqa: E402
+
+# ------------------ Global Variables Definition ------------------ #
+DEFAULT_SIZES = "12x16,100x100,500x500,1000x1000,2000x2000"
+SPRITE_CELL_LIMIT = 250000  # above that, sprite benchmarks are skipped
+IMAGE_CELL_SIZE = 4     # pixels per cell of the whole-maze image
+ENV_COUNT = 256     # games of the batched environment benchmark
+ENV_CELL_LIMIT = 10000  # above that, environment benchmarks are skipped
+EDIT_CELL_LIMIT = 250000    # above that, editing benchmarks are skipped
+MIN_TIME = 0.2      # seconds each benchmark is repeated for at least
+
+
+# ------------------ Function Definition ------------------ #
+def measure(func, min_time=MIN_TIME):
+    """
+    time func, one run under tracemalloc for the memory peak first
+    @param func: callable taking no argument, returns the op count; or a
+                 (setup, func) pair, setup runs untimed before every run
+    @param min_time: seconds to repeat func for at least
+    @return: dict of ops_per_sec, seconds_per_run, runs, peak_bytes
+    """
+    setup = None
+    if isinstance(func, tuple):
+        setup, func = func
+        setup()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    runs = 0
+    ops = 0
+    elapsed = 0.0
+    while runs == 0 or elapsed < min_time:
+        if setup is not None:
+            setup()
+        time_start = time.perf_counter()
+        ops += func() or 1
+        elapsed += time.perf_counter() - time_start
+        runs += 1
+    return {
+        "ops_per_sec": ops / elapsed,
+        "seconds_per_run": elapsed / runs,
+        "runs": runs,
+        "peak_bytes": peak,
+    }
+
+
+def road_mat_of(rows, cols):
+    """
+    @return: a game road matrix, entry [0, 1] and exit [-1, -2]
+    """
+    road_mat = [[1] * cols for _ in range(rows)]
+    road_mat[0][1] = 0
+    road_mat[-1][-2] = -1
+    return road_mat
+
+
+def carved_maze(rows, cols, seed=0):
+    """
+    @return: a Maze with a carved grid and no sprites
+    """
+    main_maze = maze.Maze(seed)
+    main_maze.road_mat = road_mat_of(rows, cols)
+    main_maze.dfs_maze_generate([0, 1])
+    return main_maze
+
+
+def copy_maze(main_maze):
+    """
+    @return: a Maze on a copy of the grid of main_maze, for the
+             benchmarks that change walls
+    """
+    grid = main_maze.grid
+    copy = MazeGrid(grid.rows, grid.cols, grid.entry, grid.exit)
+    copy.h_walls = bytearray(grid.h_walls)
+    copy.v_walls = bytearray(grid.v_walls)
+    copied = maze.Maze(0)
+    copied.road_mat = [list(line) for line in main_maze.road_mat]
+    copied.grid = copy
+    return copied
+
+
+def bench_generation(rows, cols, with_sprites):
+    """
+    @return: {benchmark name: func}
+    """
+    benches = {}
+    for name in sorted(GENERATORS):
+        benches["generate:" + name] = \
+            lambda name=name: generate(name, rows, cols, 0) and 1
+
+    if with_sprites:
+        def maze_generate():
+            main_maze = carved_maze(rows, cols)     # the carving is timed
+            main_maze.maze_generate(pygame.sprite.Group(),
+                                    pygame.sprite.Group())
+        benches["Maze.dfs_maze_generate+maze_generate"] = maze_generate
+    return benches
+
+
+def bench_maze_helpers(shared_maze, with_sprites, ops=10000):
+    """
+    @param shared_maze: the carved Maze of the size, copied as its walls
+                        get broken
+    @return: {benchmark name: func}
+    """
+    main_maze = copy_maze(shared_maze)
+    rows, cols = main_maze.grid.rows, main_maze.grid.cols
+    main_maze.visited = bytearray(rows * cols)
+    rng = random.Random(0)
+    positions = [[rng.randrange(rows), rng.randrange(cols)]
+                 for _ in range(ops)]
+
+    def neighbor_select():
+        for pos in positions:
+            main_maze.neighbor_select(pos)
+        return ops
+
+    def isexit():
+        for pos in positions:
+            main_maze.isexit(pos)
+        return ops
+
+    benches = {
+        "Maze.neighbor_select": neighbor_select,
+        "Maze.isexit": isexit,
+    }
+
+    if with_sprites:
+        wall_list = pygame.sprite.Group()
+        main_maze.maze_generate(pygame.sprite.Group(), wall_list)
+        pairs = [(pos, [pos[0], pos[1] + 1]) for pos in positions
+                 if pos[1] + 1 < cols]
+        grid = main_maze.grid
+        v_walls = bytes(grid.v_walls)
+        h_walls = bytes(grid.h_walls)
+        wall_table = list(main_maze.wall_table)
+        walls = list(wall_list)
+
+        def rebuild():
+            # every run breaks the same standing walls again
+            grid.v_walls[:] = v_walls
+            grid.h_walls[:] = h_walls
+            grid.version += 1
+            main_maze.wall_table[:] = wall_table
+            wall_list.add(walls)
+
+        def wall_break():
+            for pos1, pos2 in pairs:
+                main_maze.wall_break(pos1, pos2, wall_list)
+            return len(pairs)
+        benches["Maze.wall_break"] = (rebuild, wall_break)
+    return benches
+
+
+def bench_collision(main_maze, with_sprites, ops=10000):
+    """
+    @param main_maze: the carved Maze of the size
+    @return: {benchmark name: func}
+    """
+    rows, cols = main_maze.grid.rows, main_maze.grid.cols
+    size = (cols * maze.ROAD_THICKNESS, rows * maze.ROAD_THICKNESS)
+    collider = GridCollider(main_maze.grid, maze.ROAD_THICKNESS,
+                            maze.WALL_THICKNESS, size)
+    player = maze.Player(maze.ROAD_THICKNESS, 0)
+    rng = random.Random(0)
+    speeds = [rng.choice([(3, 0), (-3, 0), (0, 3), (0, -3)])
+              for _ in range(ops)]
+
+    def moves(walls):
+        player.rect.topleft = (maze.ROAD_THICKNESS, 0)
+        for player.change_x, player.change_y in speeds:
+            player.move(walls)
+        return ops
+
+    benches = {"Player.move:grid": lambda: moves(collider)}
+    if with_sprites:
+        wall_list = pygame.sprite.Group()
+        copy_maze(main_maze).maze_generate(pygame.sprite.Group(), wall_list)
+        benches["Player.move:sprites"] = lambda: moves(wall_list)
+    return benches
+
+
+def bench_frame(main_maze, frames=100):
+    """
+    main-loop frames drawn by the GameView of the game to an offscreen
+    screen-sized surface, the player walking right along the top row
+    with the hint dots and the profile overlay shown
+    @param main_maze: the carved Maze of the size
+    @return: {benchmark name: func}
+    """
+    size = (maze.SCREEN_WIDTH, maze.SCREEN_HEIGHT)
+    screen = pygame.Surface(size)
+    player = maze.Player(0, 0)
+    state = GameState(main_maze.grid, maze.ROAD_THICKNESS,
+                      maze.WALL_THICKNESS, player_size=player.rect.size)
+    camera = Camera(size, state.bounds)
+    view = maze.GameView(size, main_maze.grid, player)
+    for teacher_id in place_teachers(state, rng=random.Random(0)):
+        view.add_teacher(teacher_id)
+    hint_path = main_maze.hint((0, 0), maze.HINT_STEPS)
+    profiler = FrameProfiler()
+    width = state.bounds[0] - state.player_width
+
+    def frame():
+        for _ in range(frames):
+            # scrolls on large mazes, whatever the walls
+            state.player_x = (state.player_x + 3) % width
+            view.draw(screen, state, camera, 1.0, hint_path, profiler,
+                      True)
+            profiler.end_frame()
+        return frames
+    return {"frame:offscreen": frame}
+
+
+def bench_render(main_maze):
+    """
+    the whole maze drawn into one image, walls through the numpy mask
+    @param main_maze: the carved Maze of the size
+    @return: {benchmark name: func}
+    """
+    grid = main_maze.grid
+    return {"render:maze_image": lambda: maze_image(
+        grid, IMAGE_CELL_SIZE, 1, maze.WARM_GREY, maze.BLACK) and 1}
+
+
+def bench_env(rows, cols):
+    """
+    bot environment steps with random actions, one op per game stepped
+    @return: {benchmark name: func}
+    """
+    rng = random.Random(0)
+    single = MazeEnv(seed=0, rows=rows, cols=cols)
+    single.reset()
+
+    def single_step():
+        _, _, terminated, truncated, _ = single.step(
+            rng.randrange(len(ACTIONS)))
+        if terminated or truncated:
+            single.reset()
+
+    batch = VecMazeEnv(ENV_COUNT, seed=0, rows=rows, cols=cols)
+    batch.reset()
+    actions = [[rng.randrange(len(ACTIONS)) for _ in range(ENV_COUNT)]
+               for _ in range(64)]
+    steps = [0]
+
+    def batch_step():
+        steps[0] += 1
+        batch.step(actions[steps[0] % len(actions)])
+        return ENV_COUNT
+
+    return {"env:step": single_step, "env:vec_step": batch_step}
+
+
+def bench_edit(main_maze, ops=100):
+    """
+    walls toggled with the distance field kept up to date in place,
+    against rebuilding the field
+    @param main_maze: the carved Maze of the size, copied as its walls
+                      get toggled
+    @return: {benchmark name: func}
+    """
+    grid = copy_maze(main_maze).grid
+    rows, cols = grid.rows, grid.cols
+    distance_field(grid)
+    rng = random.Random(0)
+    pairs = [((row, col), (row, col + 1)) for row, col in (
+        (rng.randrange(rows), rng.randrange(cols - 1)) for _ in range(ops))]
+
+    def toggle():
+        for pos1, pos2 in pairs:
+            toggle_wall(grid, pos1, pos2)
+            toggle_wall(grid, pos1, pos2)
+        return 2 * ops
+
+    return {"edit:toggle_wall": toggle,
+            "solver:DistanceField": lambda: DistanceField(grid) and 1}
+
+
+def git_commit():
+    """
+    @return: the HEAD commit of the repo, None outside git
+    """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, names=None, min_time=MIN_TIME):
+    """
+    run every benchmark for every size
+    @param sizes: list of (rows, cols)
+    @param names: only run benchmarks whose name contains one of these
+    @param min_time: seconds each benchmark is repeated for at least
+    @return: list of result dicts
+    """
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    # the image files are not needed, sprites share plain surfaces
+    for path in (maze.PLAYER_IMAGE_PATH, maze.TEACHER_IMAGE_PATH):
+        assets.images[(path, False)] = pygame.Surface((30, 30)).convert()
+
+    def wanted(name):
+        return not names or any(part in name for part in names)
+
+    results = []
+    for rows, cols in sizes:
+        cells = rows * cols
+        with_sprites = cells <= SPRITE_CELL_LIMIT
+        carved = []
+
+        def shared():
+            # one maze per size, carved for the first suite that wants it
+            if not carved:
+                carved.append(carved_maze(rows, cols))
+            return carved[0]
+
+        # (benchmark names, builder), a builder only runs if one of its
+        # benchmarks is wanted
+        suites = [
+            (["generate:" + name for name in GENERATORS]
+             + ["Maze.dfs_maze_generate+maze_generate"],
+             lambda: bench_generation(rows, cols, with_sprites)),
+            (["Maze.neighbor_select", "Maze.isexit", "Maze.wall_break"],
+             lambda: bench_maze_helpers(shared(), with_sprites)),
+            (["Player.move:grid", "Player.move:sprites"],
+             lambda: bench_collision(shared(), with_sprites)),
+            (["frame:offscreen"], lambda: bench_frame(shared())),
+            (["render:maze_image"], lambda: bench_render(shared())),
+        ]
+        if cells <= ENV_CELL_LIMIT:
+            suites.append((["env:step", "env:vec_step"],
+                           lambda: bench_env(rows, cols)))
+        if cells <= EDIT_CELL_LIMIT:
+            suites.append((["edit:toggle_wall", "solver:DistanceField"],
+                           lambda: bench_edit(shared())))
+        benches = {}
+        for suite_names, build in suites:
+            if any(wanted(name) for name in suite_names):
+                benches.update(build())
+        for name, func in benches.items():
+            if not wanted(name):
+                continue
+            result = measure(func, min_time)
+            result.update(name=name, rows=rows, cols=cols)
+            results.append(result)
+            print("%-40s %5dx%-5d %14.1f ops/s %10.1f KiB peak"
+                  % (name, rows, cols, result["ops_per_sec"],
+                     result["peak_bytes"] / 1024.0))
+            sys.stdout.flush()
+    pygame.quit()
+    return results
+
+
+def compare(results, old_path):
+    """
+    print the speed of every result relative to an older run
+    @param results: list of result dicts
+    @param old_path: JSON file written by an older run
+    """
+    with open(old_path) as old_file:
+        old = {(r["name"], r["rows"], r["cols"]): r
+               for r in json.load(old_file)["results"]}
+    for result in results:
+        before = old.get((result["name"], result["rows"], result["cols"]))
+        if before:
+            print("%-40s %5dx%-5d %8.2fx" % (
+                result["name"], result["rows"], result["cols"],
+                result["ops_per_sec"] / before["ops_per_sec"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="comma separated ROWSxCOLS list")
+    parser.add_argument("--only", default="",
+                        help="comma separated benchmark name filters")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="JSON of an older run")
+    args = parser.parse_args(argv)
+
+    sizes = [tuple(int(n) for n in size.split("x"))
+             for size in args.sizes.split(",")]
+    names = [name for name in args.only.split(",") if name]
+    results = run(sizes, names, args.min_time)
+
+    with open(args.output, "w") as output:
+        json.dump({
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }, output, indent=1)
+    if args.compare:
+        compare(results, args.compare)
+
+
+# ------------------ Debug Statement ------------------ #
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# !python3
+# coding=utf-8
+
+"""
+Scrolling camera for the maze runner game.
+
+The game state lives in world pixels (the whole maze), the screen shows a
+window of it. The camera keeps that window centered on the player and
+inside the world, and converts between world and screen coordinates.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+
+# ------------------ Class Definition ------------------ #
+
+class Camera(object):
+    """
+    the window of the world shown on the screen
+    """
+
+    def __init__(self, view_size, world_size):
+        """
+        constructor init, looking at the top-left corner of the world
+        @param view_size: (width, height) of the screen
+        @param world_size: (width, height) of the maze in pixels
+        """
+        self.width, self.height = view_size
+        self.world_width, self.world_height = world_size
+        self.x = 0  # world position of the top-left corner of the screen
+        self.y = 0
+
+    @property
+    def offset(self):
+        return self.x, self.y
+
+    def follow(self, x, y, width=0, height=0):
+        """
+        center the view on a box, without showing outside the world
+        @return: True if the view has moved
+        """
+        old = (self.x, self.y)
+        self.x = min(max(x + width // 2 - self.width // 2, 0),
+                     max(self.world_width - self.width, 0))
+        self.y = min(max(y + height // 2 - self.height // 2, 0),
+                     max(self.world_height - self.height, 0))
+        return (self.x, self.y) != old
+
+    def to_screen(self, x, y):
+        return x - self.x, y - self.y
+
+    def to_world(self, x, y):
+        return x + self.x, y + self.y
+
+    def visible(self, x, y, width, height):
+        """
+        @return: True if the world box shows on the screen
+        """
+        return x < self.x + self.width and x + width > self.x \
+            and y < self.y + self.height and y + height > self.y
+
+    def visible_cells(self, cell_size, rows, cols):
+        """
+        the grid cells on the screen, one more on every side for the
+        walls that stick out of their cell
+        @return: (row_first, row_last, col_first, col_last), inclusive
+        """
+        return (max(self.y // cell_size - 1, 0),
+                min((self.y + self.height) // cell_size + 1, rows - 1),
+                max(self.x // cell_size - 1, 0),
+                min((self.x + self.width) // cell_size + 1, cols - 1))
@@ -0,0 +1,308 @@
+# !python3
+# coding=utf-8
+
+"""
+Chunked, lazily generated mazes for the maze runner game.
+
+An endless maze is cut into chunks of chunk_rows x chunk_cols cells.
+A chunk is carved only when something looks at it, from a seed derived
+from (seed, chunk row, chunk col), so it comes out the same every time.
+Chunks are kept in an LRU cache of at most max_chunks and regenerated
+identically after eviction, so memory stays bounded however far the
+player walks. Every chunk is a perfect maze, and every border between
+two neighboring chunks has exactly one passage, so any cell can reach
+any other.
+
+StreamingState plays a game on it: the rules run on a window grid
+around the player, which recenters once the player comes near its edge,
+and the chunks around the player are generated ahead of it.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import collections
+import random
+
+from engine import GameState
+from generators import generate
+from grid import MazeGrid
+
+# ------------------ Global Variables Definition ------------------ #
+_MASK = (1 << 64) - 1
+_EAST = 1   # border kinds, part of the border hash
+_SOUTH = 2
+
+
+# ------------------ Function Definition ------------------ #
+def _mix(*values):
+    """
+    splitmix64 over a few ints, a fast hash that is the same in every run
+    @return: 64-bit int
+    """
+    state = 0
+    for value in values:
+        state = (state + (value & _MASK) + 0x9E3779B97F4A7C15) & _MASK
+        state = ((state ^ (state >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+        state = ((state ^ (state >> 27)) * 0x94D049BB133111EB) & _MASK
+        state ^= state >> 31
+    return state
+
+
+# ------------------ Class Definition ------------------ #
+
+class ChunkedMaze(object):
+    """
+    an endless maze in every direction, cells are (row, col) ints
+    """
+
+    def __init__(self, seed=0, chunk_rows=32, chunk_cols=32,
+                 algorithm="dfs", max_chunks=64):
+        """
+        constructor init, nothing is generated yet
+        @param seed: int seed of the whole maze
+        @param chunk_rows: rows of a chunk
+        @param chunk_cols: cols of a chunk
+        @param algorithm: generator name, see generators.GENERATORS
+        @param max_chunks: chunks kept in memory at most
+        """
+        self.seed = seed
+        self.chunk_rows = chunk_rows
+        self.chunk_cols = chunk_cols
+        self.algorithm = algorithm
+        self.max_chunks = max_chunks
+        self.generated = 0  # chunks carved so far, regenerations included
+        self._chunks = collections.OrderedDict()  # (row, col) -> MazeGrid
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def chunk(self, chunk_row, chunk_col):
+        """
+        the carved chunk, generated on demand
+        @return: the MazeGrid of that chunk
+        """
+        key = (chunk_row, chunk_col)
+        grid = self._chunks.get(key)
+        if grid is not None:
+            self._chunks.move_to_end(key)
+            return grid
+
+        rng = random.Random(_mix(self.seed, chunk_row, chunk_col))
+        grid = generate(self.algorithm, self.chunk_rows, self.chunk_cols, rng)
+        self.generated += 1
+        self._chunks[key] = grid
+        while len(self._chunks) > self.max_chunks:
+            self._chunks.popitem(last=False)
+        return grid
+
+    def ensure_around(self, pos, radius=1):
+        """
+        generate the chunks around a cell ahead of the player
+        @param pos: (row, col)
+        @param radius: chunks on every side of the chunk of pos
+        """
+        chunk_row = pos[0] // self.chunk_rows
+        chunk_col = pos[1] // self.chunk_cols
+        for row in range(chunk_row - radius, chunk_row + radius + 1):
+            for col in range(chunk_col - radius, chunk_col + radius + 1):
+                self.chunk(row, col)
+
+    def _passage(self, kind, chunk_row, chunk_col):
+        """
+        @return: where the east (row offset) or south (col offset) border
+                 of a chunk is open, without generating the chunk
+        """
+        size = self.chunk_rows if kind == _EAST else self.chunk_cols
+        return _mix(self.seed, kind, chunk_row, chunk_col) % size
+
+    def has_wall(self, pos1, pos2):
+        """
+        @param pos1: (row, col)
+        @param pos2: (row, col), adjacent to pos1
+        @return: True if the wall between the two cells is standing
+        """
+        (row1, col1), (row2, col2) = sorted((tuple(pos1), tuple(pos2)))
+        chunk_row, local_row = divmod(row1, self.chunk_rows)
+        chunk_col, local_col = divmod(col1, self.chunk_cols)
+
+        if row1 == row2 and col2 == col1 + 1:
+            if local_col == self.chunk_cols - 1:
+                return local_row != self._passage(_EAST, chunk_row, chunk_col)
+            grid = self.chunk(chunk_row, chunk_col)
+            return grid.v_walls[
+                local_row * (self.chunk_cols - 1) + local_col] == 1
+        if col1 == col2 and row2 == row1 + 1:
+            if local_row == self.chunk_rows - 1:
+                return local_col != self._passage(_SOUTH, chunk_row,
+                                                  chunk_col)
+            grid = self.chunk(chunk_row, chunk_col)
+            return grid.h_walls[local_row * self.chunk_cols + local_col] == 1
+        raise ValueError("cells %s and %s are not adjacent" % (pos1, pos2))
+
+    def open_neighbors(self, pos):
+        """
+        @param pos: (row, col)
+        @return: the (row, col) reachable from pos in one step
+        """
+        row, col = pos
+        return [next_pos for next_pos in ((row + 1, col), (row - 1, col),
+                                          (row, col + 1), (row, col - 1))
+                if not self.has_wall(pos, next_pos)]
+
+    def window(self, row, col, rows, cols):
+        """
+        copy a rectangle of the endless maze into a MazeGrid, so the
+        collider, the solvers and the renderer can work on it; it is
+        copied one chunk at a time, so a window larger than max_chunks
+        does not evict its own chunks
+        @param row: top row of the window
+        @param col: left col of the window
+        @param rows: window rows
+        @param cols: window cols
+        @return: the MazeGrid, cell (0, 0) is (row, col) of the maze
+        """
+        grid = MazeGrid(rows, cols, entry=(0, 0), exit_pos=(0, 0))
+        chunk_rows = self.chunk_rows
+        chunk_cols = self.chunk_cols
+        for chunk_row in range(row // chunk_rows,
+                               (row + rows - 1) // chunk_rows + 1):
+            # chunk rows inside the window, local to the chunk
+            row_first = max(row - chunk_row * chunk_rows, 0)
+            row_last = min(row + rows - chunk_row * chunk_rows,
+                           chunk_rows) - 1
+            for chunk_col in range(col // chunk_cols,
+                                   (col + cols - 1) // chunk_cols + 1):
+                self._copy_chunk(grid, row, col, chunk_row, chunk_col,
+                                 row_first, row_last)
+        return grid
+
+    def _copy_chunk(self, grid, row, col, chunk_row, chunk_col, row_first,
+                    row_last):
+        """
+        copy the walls of one chunk, local rows row_first to row_last,
+        into the window grid whose cell (0, 0) is (row, col)
+        """
+        chunk_rows = self.chunk_rows
+        chunk_cols = self.chunk_cols
+        rows = grid.rows
+        cols = grid.cols
+        chunk = self.chunk(chunk_row, chunk_col)
+        col_first = max(col - chunk_col * chunk_cols, 0)
+        col_last = min(col + cols - chunk_col * chunk_cols, chunk_cols) - 1
+        # window col of col_first, the last window col has no east wall
+        window_col = chunk_col * chunk_cols + col_first - col
+        v_last = min(col_last, cols - 2 - window_col + col_first)
+        east = self._passage(_EAST, chunk_row, chunk_col)
+        south = self._passage(_SOUTH, chunk_row, chunk_col)
+        south_walls = bytes(local_col != south for local_col
+                            in range(col_first, col_last + 1))
+
+        for local_row in range(row_first, row_last + 1):
+            window_row = chunk_row * chunk_rows + local_row - row
+            # walls right of the cells, the chunk border one from its hash
+            if v_last >= col_first:
+                start = window_row * (cols - 1) + window_col
+                inner_last = min(v_last, chunk_cols - 2)
+                if inner_last >= col_first:
+                    chunk_start = local_row * (chunk_cols - 1) + col_first
+                    grid.v_walls[start:start + inner_last - col_first + 1] \
+                        = chunk.v_walls[chunk_start:chunk_start
+                                        + inner_last - col_first + 1]
+                if v_last == chunk_cols - 1:
+                    grid.v_walls[start + v_last - col_first] = \
+                        local_row != east
+            # walls under the cells, the last window row has none
+            if window_row < rows - 1:
+                start = window_row * cols + window_col
+                if local_row < chunk_rows - 1:
+                    chunk_start = local_row * chunk_cols + col_first
+                    grid.h_walls[start:start + col_last - col_first + 1] = \
+                        chunk.h_walls[chunk_start:chunk_start
+                                      + col_last - col_first + 1]
+                else:
+                    grid.h_walls[start:start + col_last - col_first + 1] = \
+                        south_walls
+
+
+class StreamingState(GameState):
+    """
+    a GameState on an endless ChunkedMaze, through a window of it that
+    follows the player; there is no way out, so it is never won
+    """
+
+    def __init__(self, maze, rows=24, cols=32, margin=6, radius=1,
+                 start=(0, 0), road_thickness=50, wall_thickness=6,
+                 **kwargs):
+        """
+        constructor init, the player starts in the start cell
+        @param maze: the ChunkedMaze
+        @param rows: window rows
+        @param cols: window cols
+        @param margin: cells from the window edge that recenter it,
+                       less than half the window
+        @param radius: chunks generated on every side of the player chunk
+        @param start: (row, col) of the maze the player starts in
+        @param kwargs: passed to GameState (player_size, blood, speed)
+        """
+        self.maze = maze
+        self.rows = rows
+        self.cols = cols
+        self.margin = margin
+        self.radius = radius
+        self.origin = (start[0] - rows // 2, start[1] - cols // 2)
+        GameState.__init__(self, self._window(), road_thickness,
+                           wall_thickness, **kwargs)
+        # in the middle of the cell, clear of the walls around it
+        self.player_x += (road_thickness - self.player_width) // 2
+        self.player_y += (road_thickness - self.player_height) // 2
+        self.prev_x = self.player_x
+        self.prev_y = self.player_y
+
+    def _window(self):
+        """
+        @return: the window grid at self.origin, entry in its middle
+        """
+        row, col = self.origin
+        center = (self.rows // 2, self.cols // 2)
+        self.maze.ensure_around((row + center[0], col + center[1]),
+                                self.radius)
+        grid = self.maze.window(row, col, self.rows, self.cols)
+        grid.entry = center
+        grid.exit = (self.rows - 1, self.cols - 1)  # for the solvers only
+        return grid
+
+    def update(self):
+        hits = GameState.update(self)
+        self.recenter()
+        return hits
+
+    def recenter(self):
+        """
+        slide the window so the player is in its middle again, once the
+        player is within margin cells of its edge
+        @return: True if the window moved
+        """
+        row, col = self.player_cell()
+        margin = self.margin
+        if margin <= row < self.rows - margin \
+                and margin <= col < self.cols - margin:
+            return False
+        shift_row = row - self.rows // 2
+        shift_col = col - self.cols // 2
+        self.origin = (self.origin[0] + shift_row,
+                       self.origin[1] + shift_col)
+        self.rebase(self._window(), shift_col * self.road_thickness,
+                    shift_row * self.road_thickness)
+        return True
+
+    def world_cell(self):
+        """
+        @return: (row, col) of the maze under the center of the player
+        """
+        row, col = self.player_cell()
+        return self.origin[0] + row, self.origin[1] + col
+
+    @property
+    def won(self):
+        return False
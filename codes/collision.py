@@ -0,0 +1,116 @@
+# !python3
+# coding=utf-8
+
+"""
+Grid-indexed collision for the maze runner game.
+
+Walls sit on the edges of a grid of road_thickness cells, so the walls a
+box can touch are fully determined by the cells it covers. Only those are
+tested, which keeps a move O(1) no matter how large the maze is. Boxes and
+walls are plain (x, y, width, height) tuples, no pygame needed.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+
+# ------------------ Function Definition ------------------ #
+def wall_rect(mode, row, col, road_thickness, wall_thickness):
+    """
+    @param mode: 1 for the wall under (row, col), 2 for the one right of it
+    @param road_thickness: cell size in pixels
+    @param wall_thickness: wall width in pixels, centered on the edge
+    @return: (x, y, width, height) of that wall
+    """
+    if mode == 1:
+        return (col * road_thickness,
+                (row + 1) * road_thickness - wall_thickness // 2,
+                road_thickness, wall_thickness)
+    return ((col + 1) * road_thickness - wall_thickness // 2,
+            row * road_thickness, wall_thickness, road_thickness)
+
+
+# ------------------ Class Definition ------------------ #
+
+class GridCollider(object):
+    """
+    collision layer over the standing walls of a MazeGrid
+    """
+
+    def __init__(self, grid, road_thickness, wall_thickness, bounds=None):
+        """
+        constructor init
+        @param grid: the MazeGrid
+        @param road_thickness: cell size in pixels
+        @param wall_thickness: wall width in pixels, centered on the edge
+        @param bounds: (width, height) the box is clamped into, the maze
+                       size if None
+        """
+        self.grid = grid
+        self.road_thickness = road_thickness
+        self.wall_thickness = wall_thickness
+        if bounds is None:
+            bounds = (grid.cols * road_thickness, grid.rows * road_thickness)
+        self.bounds = bounds
+
+    def hits(self, x, y, width, height):
+        """
+        the standing walls overlapping a box, only the walls around the
+        cells the box covers are looked at
+        @return: list of (x, y, width, height)
+        """
+        grid = self.grid
+        cols = grid.cols
+        road = self.road_thickness
+        wall = self.wall_thickness
+        half = wall // 2
+
+        row_first = max(y // road - 1, 0)
+        row_last = min((y + height - 1) // road + 1, grid.rows - 1)
+        col_first = max(x // road - 1, 0)
+        col_last = min((x + width - 1) // road + 1, cols - 1)
+
+        rects = []
+        for row in range(row_first, min(row_last, grid.rows - 2) + 1):
+            wall_y = (row + 1) * road - half
+            if wall_y >= y + height or wall_y + wall <= y:
+                continue
+            for col in range(col_first, col_last + 1):
+                wall_x = col * road
+                if grid.h_walls[row * cols + col] \
+                        and wall_x < x + width and wall_x + road > x:
+                    rects.append((wall_x, wall_y, road, wall))
+        for col in range(col_first, min(col_last, cols - 2) + 1):
+            wall_x = (col + 1) * road - half
+            if wall_x >= x + width or wall_x + wall <= x:
+                continue
+            for row in range(row_first, row_last + 1):
+                wall_y = row * road
+                if grid.v_walls[row * (cols - 1) + col] \
+                        and wall_y < y + height and wall_y + road > y:
+                    rects.append((wall_x, wall_y, wall, road))
+        return rects
+
+    def move(self, x, y, width, height, change_x, change_y):
+        """
+        move a box, first left/right then up/down, sliding along the walls
+        @return: the new (x, y)
+        """
+        bound_x, bound_y = self.bounds
+
+        # moving left/right
+        x = min(max(x + change_x, 0), bound_x - width)
+        for wall_x, _, wall_width, _ in self.hits(x, y, width, height):
+            if change_x > 0:
+                x = wall_x - width
+            else:
+                x = wall_x + wall_width
+
+        # moving up/down
+        y = min(max(y + change_y, 0), bound_y - height)
+        for _, wall_y, _, wall_height in self.hits(x, y, width, height):
+            if change_y > 0:
+                y = wall_y - height
+            else:
+                y = wall_y + wall_height
+
+        return x, y
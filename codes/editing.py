@@ -0,0 +1,73 @@
+# !python3
+# coding=utf-8
+
+"""
+Runtime maze editing for the maze runner game.
+
+Walls can be built or broken while a game runs, for example to open a
+shortcut as a reward. The distance fields cached by the solver are
+updated in place and only touch the cells whose distance changes, so an
+edit stays cheap on a large maze. Reachability follows from the same
+fields. Collision (GridCollider) and rendering (draw_view) read the wall
+flags of the grid directly, so they see an edit at once; views cached
+by the caller are keyed on grid.version.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+from solver import cached_fields, distance_field
+
+
+# ------------------ Function Definition ------------------ #
+def set_wall(grid, pos1, pos2, standing):
+    """
+    build or break the wall between two adjacent cells
+    @param grid: the MazeGrid
+    @param pos1: (row, col)
+    @param pos2: (row, col) next to pos1
+    @param standing: True to build the wall, False to break it
+    @return: True if the wall changed
+    """
+    cell1 = grid.index(pos1)
+    cell2 = grid.index(pos2)
+    if grid.has_wall(cell1, cell2) == bool(standing):
+        return False
+    # fields already stale are rebuilt on their next use instead
+    fields = [field for field in cached_fields(grid)
+              if field.version == grid.version]
+    if standing:
+        grid.build_wall(cell1, cell2)
+    else:
+        grid.break_wall(cell1, cell2)
+    for field in fields:
+        field.update(cell1, cell2)
+    return True
+
+
+def toggle_wall(grid, pos1, pos2):
+    """
+    build the wall between two adjacent cells if it is broken, break it
+    if it stands
+    @return: True if the wall stands now
+    """
+    standing = not grid.has_wall(grid.index(pos1), grid.index(pos2))
+    set_wall(grid, pos1, pos2, standing)
+    return standing
+
+
+def reachable(grid, pos, target=None):
+    """
+    @param grid: the MazeGrid
+    @param pos: (row, col)
+    @param target: (row, col), the exit if None
+    @return: True if pos still has a way to the target
+    """
+    return distance_field(grid, target).distance_from(pos) >= 0
+
+
+def solvable(grid):
+    """
+    @return: True if the entry still has a way to the exit
+    """
+    return reachable(grid, grid.entry)
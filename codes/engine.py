@@ -0,0 +1,264 @@
+# !python3
+# coding=utf-8
+
+"""
+Game rules of the maze runner game, without pygame.
+
+GameState holds everything the main loop changes: the player box and
+speed, the teachers, blood, and winning or losing. main() drives it from
+pygame events. simulate() drives the same transitions from a scripted or
+programmatic input stream with no window, audio or frame clock, for bots,
+load tests and regression tests on a machine without a display.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import time
+
+from collision import GridCollider
+from generators import generate, make_rng
+from placement import place_teachers
+
+# ------------------ Global Variables Definition ------------------ #
+LEFT = (-1, 0)      # directions, (x, y) signs
+RIGHT = (1, 0)
+UP = (0, -1)
+DOWN = (0, 1)
+
+TICK_RATE = 60      # ticks per second of the game rules
+PLAYER_SPEED = 3    # pixels per tick
+WRONG_ANSWER_COST = 20
+
+
+# ------------------ Class Definition ------------------ #
+
+class GameState(object):
+    """
+    one running game
+    """
+
+    def __init__(self, grid, road_thickness, wall_thickness, bounds=None,
+                 player_size=(30, 30), blood=100, speed=PLAYER_SPEED):
+        """
+        constructor init, the player starts in the entry cell
+        @param grid: the carved MazeGrid
+        @param road_thickness: cell size in pixels
+        @param wall_thickness: wall width in pixels
+        @param bounds: (width, height) of the playing field, the maze size
+                       if None
+        @param player_size: (width, height) of the player box
+        @param blood: starting blood
+        @param speed: pixels per tick for a held direction key
+        """
+        self.grid = grid
+        self.road_thickness = road_thickness
+        self.collider = GridCollider(grid, road_thickness, wall_thickness,
+                                     bounds)
+        self.bounds = self.collider.bounds
+        self.player_x = grid.entry[1] * road_thickness
+        self.player_y = grid.entry[0] * road_thickness
+        self.prev_x = self.player_x     # player box before the last tick
+        self.prev_y = self.player_y
+        self.player_width, self.player_height = player_size
+        self.change_x = 0
+        self.change_y = 0
+        self.speed = speed
+        self.blood = blood
+        self.teachers = {}      # teacher id -> (x, y, width, height)
+        self._next_teacher = 0
+        self.ticks = 0
+
+    def rebase(self, grid, shift_x, shift_y):
+        """
+        move the game onto another grid, for a window sliding over a
+        larger maze; every box moves by (-shift_x, -shift_y) and the
+        teachers left outside the new grid are dropped
+        @param grid: the new MazeGrid
+        @param shift_x: world x of the new grid in the old one
+        @param shift_y: world y of the new grid in the old one
+        """
+        self.grid = grid
+        self.collider = GridCollider(grid, self.road_thickness,
+                                     self.collider.wall_thickness)
+        self.bounds = self.collider.bounds
+        self.player_x -= shift_x
+        self.player_y -= shift_y
+        self.prev_x -= shift_x
+        self.prev_y -= shift_y
+        width, height = self.bounds
+        teachers = {}
+        for teacher_id, (x, y, tw, th) in self.teachers.items():
+            x -= shift_x
+            y -= shift_y
+            if 0 <= x and x + tw <= width and 0 <= y and y + th <= height:
+                teachers[teacher_id] = (x, y, tw, th)
+        self.teachers = teachers
+
+    def add_teacher(self, x, y, width=30, height=30):
+        """
+        @return: the teacher id, reported by update() when hit
+        """
+        teacher_id = self._next_teacher
+        self._next_teacher += 1
+        self.teachers[teacher_id] = (x, y, width, height)
+        return teacher_id
+
+    def press(self, direction):
+        """
+        a direction key went down
+        @param direction: LEFT, RIGHT, UP or DOWN
+        """
+        self.change_x += direction[0] * self.speed
+        self.change_y += direction[1] * self.speed
+
+    def release(self, direction):
+        """
+        a direction key went up
+        @param direction: LEFT, RIGHT, UP or DOWN
+        """
+        self.change_x -= direction[0] * self.speed
+        self.change_y -= direction[1] * self.speed
+
+    def reset_speed(self):
+        self.change_x = 0
+        self.change_y = 0
+
+    def update(self):
+        """
+        advance one tick: move the player, then take the teachers hit
+        @return: ids of the teachers hit, each one asks a question
+        """
+        self.ticks += 1
+        self.prev_x = self.player_x
+        self.prev_y = self.player_y
+        self.player_x, self.player_y = self.collider.move(
+            self.player_x, self.player_y,
+            self.player_width, self.player_height,
+            self.change_x, self.change_y)
+
+        x = self.player_x
+        y = self.player_y
+        right = x + self.player_width
+        bottom = y + self.player_height
+        hits = [teacher_id for teacher_id, (tx, ty, tw, th)
+                in self.teachers.items()
+                if tx < right and tx + tw > x and ty < bottom and ty + th > y]
+        for teacher_id in hits:
+            del self.teachers[teacher_id]
+        return hits
+
+    def answer(self, correct):
+        """
+        settle a question
+        @param correct: True if the answer was right
+        """
+        if not correct:
+            self.blood -= WRONG_ANSWER_COST
+
+    @property
+    def lost(self):
+        return self.blood <= 0
+
+    @property
+    def won(self):
+        """
+        the player stands in the exit row, at or right of the exit col
+        """
+        exit_row, exit_col = self.grid.exit
+        return self.blood > 0 \
+            and self.player_y > exit_row * self.road_thickness \
+            and self.player_x >= exit_col * self.road_thickness
+
+    @property
+    def over(self):
+        return self.lost or self.won
+
+    def player_position(self, alpha=1.0):
+        """
+        the player box between the last two ticks, for rendering
+        @param alpha: 0 for the tick before, 1 for the last tick
+        @return: (x, y) rounded to pixels
+        """
+        return (int(round(self.prev_x + (self.player_x - self.prev_x)
+                          * alpha)),
+                int(round(self.prev_y + (self.player_y - self.prev_y)
+                          * alpha)))
+
+    def player_cell(self):
+        """
+        @return: (row, col) under the center of the player
+        """
+        return ((self.player_y + self.player_height // 2)
+                // self.road_thickness,
+                (self.player_x + self.player_width // 2)
+                // self.road_thickness)
+
+
+# ------------------ Function Definition ------------------ #
+def new_game(rows=12, cols=16, seed=None, teachers=15, algorithm="dfs",
+             road_thickness=50, wall_thickness=6, **kwargs):
+    """
+    generate a maze and start a headless game on it
+    @param rows: grid rows
+    @param cols: grid cols
+    @param seed: int seed or a random.Random instance
+    @param teachers: number of teachers, see placement.place_teachers
+    @param algorithm: generator name, see generators.GENERATORS
+    @param kwargs: passed to GameState
+    @return: the GameState
+    """
+    rng = make_rng(seed)
+    grid = generate(algorithm, rows, cols, rng)
+    state = GameState(grid, road_thickness, wall_thickness, **kwargs)
+    place_teachers(state, teachers, rng=rng)
+    return state
+
+
+def simulate(state, inputs, answer=None, question_bank=None,
+             max_ticks=None, tick_rate=None):
+    """
+    run a game without a window, audio or frame clock, as fast as the
+    machine goes unless tick_rate paces it
+    @param state: the GameState
+    @param inputs: iterable of per-tick event lists, or a callable taking
+                   the state and returning the event list for the tick;
+                   an event is (pressed, direction), None ends the run
+    @param answer: callable taking the Question (None without a bank)
+                   and returning the chosen letter, or True/False; every
+                   question is answered wrong if None
+    @param question_bank: questions.QuestionBank to draw from
+    @param max_ticks: stop after that many ticks, None to run until the
+                      game is over or the inputs run out
+    @param tick_rate: ticks per second to keep to (TICK_RATE for the
+                      speed of the game), None for uncapped
+    @return: the state
+    """
+    stream = None if callable(inputs) else iter(inputs)
+    ticks_start = state.ticks
+    time_start = time.perf_counter()
+    while not state.over:
+        if tick_rate:
+            delay = time_start + (state.ticks - ticks_start) / tick_rate \
+                - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if max_ticks is not None and state.ticks >= max_ticks:
+            break
+        events = inputs(state) if stream is None else next(stream, None)
+        if events is None:
+            break
+
+        for pressed, direction in events:
+            if pressed:
+                state.press(direction)
+            else:
+                state.release(direction)
+
+        for _ in state.update():
+            state.reset_speed()
+            question = question_bank.draw() if question_bank else None
+            choice = answer(question) if answer is not None else None
+            state.answer(choice is True or (
+                question is not None and choice == question.answer))
+    return state
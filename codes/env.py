@@ -0,0 +1,411 @@
+# !python3
+# coding=utf-8
+
+"""
+Bot environments for the maze runner game.
+
+MazeEnv wraps one headless GameState in the reset/step interface of Gym
+(Gymnasium's five-value step), for maze-solving policies and bots. An
+action is a direction held for one tick. VecMazeEnv steps many
+independent games at once. Each game has its own maze. Positions, blood
+and teachers are numpy arrays, and one step moves every player with the
+same collision rules as GridCollider.move, vectorized over the batch.
+Finished games start over with a new maze by themselves. Nothing here
+needs pygame.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import random
+
+try:
+    import numpy as np
+except ImportError:     # only VecMazeEnv needs it
+    np = None
+
+from engine import DOWN, LEFT, RIGHT, UP, WRONG_ANSWER_COST, new_game
+
+# ------------------ Global Variables Definition ------------------ #
+ACTIONS = [None, LEFT, RIGHT, UP, DOWN]     # action index -> direction
+OBSERVATION = ("x", "y", "row", "col", "walls", "blood")
+WALL_UP = 1     # bits of the walls observation, standing walls of the
+WALL_DOWN = 2   # cell under the center of the player, borders included
+WALL_LEFT = 4
+WALL_RIGHT = 8
+
+STEP_REWARD = -0.001    # every tick costs a little
+BLOOD_REWARD = 0.01     # taken away per blood point lost
+WIN_REWARD = 1.0
+LOSE_REWARD = -1.0
+MAX_EPISODE_TICKS = 20000   # truncated after that
+
+
+# ------------------ Function Definition ------------------ #
+def cell_walls(grid, row, col):
+    """
+    @return: the WALL_* bits standing around (row, col)
+    """
+    cols = grid.cols
+    walls = 0
+    if row == 0 or grid.h_walls[(row - 1) * cols + col]:
+        walls |= WALL_UP
+    if row == grid.rows - 1 or grid.h_walls[row * cols + col]:
+        walls |= WALL_DOWN
+    if col == 0 or grid.v_walls[row * (cols - 1) + col - 1]:
+        walls |= WALL_LEFT
+    if col == cols - 1 or grid.v_walls[row * (cols - 1) + col]:
+        walls |= WALL_RIGHT
+    return walls
+
+
+def episode_reward(blood_lost, won, lost):
+    """
+    @return: the reward of a tick
+    """
+    return STEP_REWARD - BLOOD_REWARD * blood_lost \
+        + WIN_REWARD * won + LOSE_REWARD * lost
+
+
+# ------------------ Class Definition ------------------ #
+
+class MazeEnv(object):
+    """
+    one game as a Gym-style environment
+    """
+
+    def __init__(self, seed=None, answer=None, question_bank=None,
+                 max_ticks=MAX_EPISODE_TICKS, repeat=1, **game):
+        """
+        constructor init
+        @param seed: int seed of the episode mazes, None for a random one
+        @param answer: callable taking the Question (None without a bank)
+                       and returning the chosen letter, or True/False;
+                       every question is answered wrong if None
+        @param question_bank: questions.QuestionBank to draw from
+        @param max_ticks: ticks before an episode is truncated
+        @param repeat: ticks an action is held for by one step
+        @param game: passed to engine.new_game (rows, cols, teachers,
+                     algorithm, road_thickness, player_size, blood, ...)
+        """
+        self.rng = random.Random(seed)
+        self.answer = answer
+        self.question_bank = question_bank
+        self.max_ticks = max_ticks
+        self.repeat = repeat
+        self.game = game
+        self.state = None
+
+    def reset(self, seed=None):
+        """
+        start an episode on a new maze
+        @param seed: reseed the episode mazes
+        @return: (observation, info)
+        """
+        if seed is not None:
+            self.rng.seed(seed)
+        # the old maze goes with the old state, its distance fields too
+        self.state = new_game(seed=self.rng.randrange(2 ** 32), **self.game)
+        return self.observation(), {}
+
+    def observation(self):
+        """
+        @return: tuple of ints, named by OBSERVATION
+        """
+        state = self.state
+        row, col = state.player_cell()
+        row = min(max(row, 0), state.grid.rows - 1)
+        col = min(max(col, 0), state.grid.cols - 1)
+        return (state.player_x, state.player_y, row, col,
+                cell_walls(state.grid, row, col), state.blood)
+
+    def step(self, action):
+        """
+        hold a direction for repeat ticks, or until the episode ends
+        @param action: index in ACTIONS
+        @return: (observation, reward, terminated, truncated, info)
+        """
+        state = self.state
+        direction = ACTIONS[action]
+        blood = state.blood
+        for _ in range(self.repeat):
+            state.reset_speed()
+            if direction is not None:
+                state.press(direction)
+            for _ in state.update():
+                question = self.question_bank.draw() \
+                    if self.question_bank else None
+                choice = self.answer(question) \
+                    if self.answer is not None else None
+                state.answer(choice is True or (
+                    question is not None and choice == question.answer))
+            if state.over or state.ticks >= self.max_ticks:
+                break
+        won = state.won
+        lost = state.lost
+        reward = episode_reward(blood - state.blood, won, lost)
+        return (self.observation(), reward, won or lost,
+                not (won or lost) and state.ticks >= self.max_ticks,
+                {"ticks": state.ticks, "won": won})
+
+
+class VecMazeEnv(object):
+    """
+    a batch of independent games stepped together on numpy arrays
+    """
+
+    def __init__(self, count, seed=None, answer_rate=0.0,
+                 max_ticks=MAX_EPISODE_TICKS, repeat=1, **game):
+        """
+        constructor init
+        @param count: number of games
+        @param seed: int seed of the episode mazes, None for a random one
+        @param answer_rate: chance of a right answer to a question, the
+                            batched stand-in of MazeEnv's answer
+        @param max_ticks: ticks before an episode is truncated
+        @param repeat: ticks an action is held for by one step
+        @param game: passed to engine.new_game, every game gets the same
+                     maze size and settings
+        """
+        if np is None:
+            raise RuntimeError("VecMazeEnv needs numpy")
+        self.count = count
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(self.rng.randrange(2 ** 32))
+        self.answer_rate = answer_rate
+        self.max_ticks = max_ticks
+        self.repeat = repeat
+        self.game = game
+
+        # the settings of every game, from a throwaway one
+        state = new_game(seed=0, **game)
+        self.rows = state.grid.rows
+        self.cols = state.grid.cols
+        self.road = state.road_thickness
+        self.wall = state.collider.wall_thickness
+        self.bound_x, self.bound_y = state.bounds
+        self.width = state.player_width
+        self.height = state.player_height
+        self.speed = state.speed
+        self.max_teachers = game.get('teachers', 15)
+
+        self.h_walls = np.ones((count, self.rows - 1, self.cols), np.bool_)
+        self.v_walls = np.ones((count, self.rows, self.cols - 1), np.bool_)
+        self.exits = np.zeros((count, 2), np.int64)
+        self.teachers = np.zeros((count, self.max_teachers, 4), np.int64)
+        self.alive = np.zeros((count, self.max_teachers), np.bool_)
+        self.x = np.zeros(count, np.int64)
+        self.y = np.zeros(count, np.int64)
+        self.blood = np.zeros(count, np.int64)
+        self.ticks = np.zeros(count, np.int64)
+
+        # most walls of each kind a box can overlap along and across them,
+        # only those are gathered
+        self.span_along = [(size - 1) // self.road + 2
+                           for size in (self.width, self.height)]
+        self.span_across = [(size + self.wall - 1) // self.road + 1
+                            for size in (self.height, self.width)]
+        self._env = np.arange(count)
+        self._directions = np.array([direction or (0, 0)
+                                     for direction in ACTIONS]) * self.speed
+
+    def _reset_game(self, index):
+        state = new_game(seed=self.rng.randrange(2 ** 32), **self.game)
+        grid = state.grid
+        self.h_walls[index] = np.frombuffer(grid.h_walls, np.uint8).reshape(
+            self.rows - 1, self.cols)
+        self.v_walls[index] = np.frombuffer(grid.v_walls, np.uint8).reshape(
+            self.rows, self.cols - 1)
+        self.exits[index] = grid.exit
+        self.alive[index] = False
+        for slot, box in enumerate(state.teachers.values()):
+            self.teachers[index, slot] = box
+            self.alive[index, slot] = True
+        self.x[index] = state.player_x
+        self.y[index] = state.player_y
+        self.blood[index] = state.blood
+        self.ticks[index] = 0
+
+    def reset(self, seed=None):
+        """
+        start every game on a new maze
+        @param seed: reseed the episode mazes
+        @return: (observations, info)
+        """
+        if seed is not None:
+            self.rng.seed(seed)
+            self.np_rng = np.random.default_rng(self.rng.randrange(2 ** 32))
+        for index in range(self.count):
+            self._reset_game(index)
+        return self.observation(), {}
+
+    def observation(self):
+        """
+        @return: int array of count x len(OBSERVATION)
+        """
+        rows = self.rows
+        cols = self.cols
+        row = np.clip((self.y + self.height // 2) // self.road, 0, rows - 1)
+        col = np.clip((self.x + self.width // 2) // self.road, 0, cols - 1)
+        env = self._env
+        up = (row == 0) | self.h_walls[env, np.maximum(row - 1, 0), col]
+        down = (row == rows - 1) \
+            | self.h_walls[env, np.minimum(row, rows - 2), col]
+        left = (col == 0) | self.v_walls[env, row, np.maximum(col - 1, 0)]
+        right = (col == cols - 1) \
+            | self.v_walls[env, row, np.minimum(col, cols - 2)]
+        walls = up * WALL_UP + down * WALL_DOWN + left * WALL_LEFT \
+            + right * WALL_RIGHT
+        return np.stack([self.x, self.y, row, col, walls, self.blood],
+                        axis=1)
+
+    def _hits(self, x, y):
+        """
+        the walls overlapping every box, see GridCollider.hits
+        @return: (hit mask, wall x, wall y, wall width, wall height), each
+                 count x candidates, candidates in hits() order
+        """
+        road = self.road
+        wall = self.wall
+        half = wall // 2
+        rows = self.rows
+        cols = self.cols
+        right = x + self.width
+        bottom = y + self.height
+        row_first = np.maximum(y // road - 1, 0)
+        row_last = np.minimum((bottom - 1) // road + 1, rows - 1)
+        col_first = np.maximum(x // road - 1, 0)
+        col_last = np.minimum((right - 1) // road + 1, cols - 1)
+
+        # walls gathered from the flat arrays, one take per kind, in the
+        # order GridCollider.hits tests them, which decides the last hit
+
+        # walls under a cell, rows outer, cols inner
+        row = ((y + half - wall) // road)[:, None] \
+            + np.arange(self.span_across[0])
+        col = (x // road)[:, None] + np.arange(self.span_along[0])
+        h_y = (row + 1) * road - half
+        h_row_ok = (row >= row_first[:, None]) \
+            & (row <= np.minimum(row_last, rows - 2)[:, None]) \
+            & (h_y < bottom[:, None]) & (h_y + wall > y[:, None])
+        h_x = col * road
+        h_col_ok = (col <= col_last[:, None]) \
+            & (h_x < right[:, None]) & (h_x + road > x[:, None])
+        h_cell = ((self._env[:, None] * (rows - 1)
+                   + np.clip(row, 0, rows - 2)) * cols)[:, :, None] \
+            + np.minimum(col, cols - 1)[:, None, :]
+        h_hit = h_row_ok[:, :, None] & h_col_ok[:, None, :] \
+            & self.h_walls.reshape(-1).take(h_cell)
+        shape = h_hit.shape
+        h_hit = h_hit.reshape(self.count, -1)
+        h_x = np.broadcast_to(h_x[:, None, :], shape).reshape(self.count, -1)
+        h_y = np.broadcast_to(h_y[:, :, None], shape).reshape(self.count, -1)
+
+        # walls right of a cell, cols outer, rows inner
+        col = ((x + half - wall) // road)[:, None] \
+            + np.arange(self.span_across[1])
+        row = (y // road)[:, None] + np.arange(self.span_along[1])
+        v_x = (col + 1) * road - half
+        v_col_ok = (col >= col_first[:, None]) \
+            & (col <= np.minimum(col_last, cols - 2)[:, None]) \
+            & (v_x < right[:, None]) & (v_x + wall > x[:, None])
+        v_y = row * road
+        v_row_ok = (row <= row_last[:, None]) \
+            & (v_y < bottom[:, None]) & (v_y + road > y[:, None])
+        v_cell = ((self._env[:, None] * rows + np.minimum(row, rows - 1))
+                  * (cols - 1))[:, None, :] \
+            + np.clip(col, 0, cols - 2)[:, :, None]
+        v_hit = v_col_ok[:, :, None] & v_row_ok[:, None, :] \
+            & self.v_walls.reshape(-1).take(v_cell)
+        shape = v_hit.shape
+        v_hit = v_hit.reshape(self.count, -1)
+        v_x = np.broadcast_to(v_x[:, :, None], shape).reshape(self.count, -1)
+        v_y = np.broadcast_to(v_y[:, None, :], shape).reshape(self.count, -1)
+
+        h_size = h_hit.shape[1]
+        v_size = v_hit.shape[1]
+        return (np.concatenate([h_hit, v_hit], axis=1),
+                np.concatenate([h_x, v_x], axis=1),
+                np.concatenate([h_y, v_y], axis=1),
+                np.repeat([road, wall], [h_size, v_size]),
+                np.repeat([wall, road], [h_size, v_size]))
+
+    def _last_hit(self, hit, values, default):
+        """
+        @return: per box, the value of its last hit, default if none
+        """
+        last = hit.shape[1] - 1 - np.argmax(hit[:, ::-1], axis=1)
+        return np.where(hit.any(axis=1), values[self._env, last], default)
+
+    def _move(self, change_x, change_y, active):
+        """
+        one tick of GridCollider.move for every active box
+        """
+        x = np.clip(self.x + change_x, 0, self.bound_x - self.width)
+        hit, wall_x, _, wall_width, _ = self._hits(x, self.y)
+        x = self._last_hit(hit, np.where(
+            change_x[:, None] > 0, wall_x - self.width, wall_x + wall_width),
+            x)
+        self.x = np.where(active, x, self.x)
+
+        y = np.clip(self.y + change_y, 0, self.bound_y - self.height)
+        hit, _, wall_y, _, wall_height = self._hits(self.x, y)
+        y = self._last_hit(hit, np.where(
+            change_y[:, None] > 0, wall_y - self.height,
+            wall_y + wall_height), y)
+        self.y = np.where(active, y, self.y)
+
+    def _take_teachers(self, active):
+        """
+        remove the teachers hit and settle their questions
+        """
+        x = self.x[:, None]
+        y = self.y[:, None]
+        tx, ty, tw, th = np.moveaxis(self.teachers, 2, 0)
+        hit = self.alive & active[:, None] \
+            & (tx < x + self.width) & (tx + tw > x) \
+            & (ty < y + self.height) & (ty + th > y)
+        self.alive &= ~hit
+        wrong = hit & (self.np_rng.random(hit.shape) >= self.answer_rate)
+        self.blood -= WRONG_ANSWER_COST * wrong.sum(axis=1)
+
+    def _over(self):
+        """
+        @return: (won, lost) bool arrays, see GameState.won and lost
+        """
+        lost = self.blood <= 0
+        won = ~lost & (self.y > self.exits[:, 0] * self.road) \
+            & (self.x >= self.exits[:, 1] * self.road)
+        return won, lost
+
+    def step(self, actions):
+        """
+        hold a direction in every game for repeat ticks, finished games
+        start over on a new maze, their observation is the new one
+        @param actions: int array of count indexes in ACTIONS
+        @return: (observations, rewards, terminated, truncated, info),
+                 arrays of count, info has the won and ticks arrays of
+                 the games before they started over
+        """
+        actions = np.asarray(actions)
+        change_x = self._directions[actions, 0]
+        change_y = self._directions[actions, 1]
+        blood = self.blood.copy()
+        active = np.ones(self.count, np.bool_)
+        for _ in range(self.repeat):
+            self.ticks += active
+            self._move(change_x, change_y, active)
+            self._take_teachers(active)
+            won, lost = self._over()
+            active &= ~(won | lost) & (self.ticks < self.max_ticks)
+            if not active.any():
+                break
+
+        won, lost = self._over()
+        terminated = won | lost
+        truncated = ~terminated & (self.ticks >= self.max_ticks)
+        rewards = episode_reward(blood - self.blood, won, lost)
+        info = {"won": won, "ticks": self.ticks.copy()}
+        for index in np.flatnonzero(terminated | truncated):
+            self._reset_game(index)
+        return self.observation(), rewards, terminated, truncated, info
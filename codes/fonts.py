@@ -0,0 +1,64 @@
+# !python3
+# coding=utf-8
+
+"""
+Font registry and rendered-text cache for the maze runner game.
+
+Each (font, size) is parsed from disk once, and each rendered text
+surface is kept in an LRU cache. Cached surfaces are shared, so blit
+them but never draw on them.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import functools
+
+import pygame
+
+# ------------------ Global Variables Definition ------------------ #
+TEXT_CACHE_SIZE = 256   # rendered text surfaces kept around
+
+_fonts = {}     # (path or system name, size, is system font) -> Font
+
+
+# ------------------ Function Definition ------------------ #
+def get_font(path, size, sys_font=False):
+    """
+    the font loaded once per (path, size)
+    @param path: font file path, or the font name when sys_font is True
+    @param size: font size
+    @param sys_font: look path up with pygame.font.SysFont
+    @return: the pygame Font
+    """
+    key = (path, size, sys_font)
+    font = _fonts.get(key)
+    if font is None:
+        if sys_font:
+            font = pygame.font.SysFont(path, size)
+        else:
+            font = pygame.font.Font(path, size)
+        _fonts[key] = font
+    return font
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(text, size, color, path, sys_font=False):
+    """
+    render antialiased text, cached by (text, size, color, font)
+    @param text: the string
+    @param size: font size
+    @param color: text color
+    @param path: font file path, or the font name when sys_font is True
+    @param sys_font: look path up with pygame.font.SysFont
+    @return: the shared text surface
+    """
+    return get_font(path, size, sys_font).render(text, True, color)
+
+
+def clear_cache():
+    """
+    drop every cached font and text surface, needed after pygame.quit
+    """
+    _fonts.clear()
+    render_text.cache_clear()
@@ -0,0 +1,406 @@
+# !python3
+# coding=utf-8
+
+"""
+Maze generation engines for the maze runner game.
+
+Every engine takes a grid size and a seed and carves a grid.MazeGrid on
+flat cell indices (row * cols + col). None of them touch pygame, so a maze
+can be built without a display. Engines are looked up by name in
+GENERATORS, use generate() to pick one. A seed carves the same maze on
+every machine, with or without numpy: the vectorized engines draw their
+random bits from the seeded random.Random, like their loops do.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import random
+
+try:
+    import numpy as np
+except ImportError:     # binary_tree and sidewinder fall back to loops
+    np = None
+
+from grid import MazeGrid
+
+# ------------------ Global Variables Definition ------------------ #
+GENERATORS = {}     # name -> generator(rows, cols, seed=None)
+
+
+# ------------------ Function Definition ------------------ #
+def register_generator(name):
+    """
+    decorator adding a generator to GENERATORS
+    @param name: the name generate() looks the generator up by
+    """
+    def decorator(func):
+        GENERATORS[name] = func
+        return func
+    return decorator
+
+
+def generate(name, rows, cols, seed=None):
+    """
+    carve a maze with the named generator
+    @param name: key in GENERATORS
+    @param rows: grid rows
+    @param cols: grid cols
+    @param seed: int seed or a random.Random instance, None for any maze
+    @return: the carved MazeGrid
+    """
+    if name not in GENERATORS:
+        raise ValueError("unknown maze generator: %s (choose from %s)"
+                         % (name, ", ".join(sorted(GENERATORS))))
+    return GENERATORS[name](rows, cols, seed)
+
+
+def make_rng(seed):
+    """
+    @param seed: int seed, a random.Random instance or None
+    @return: a random.Random instance
+    """
+    if isinstance(seed, random.Random):
+        return seed
+    return random.Random(seed)
+
+
+def random_bytes(rng, bits):
+    """
+    @param rng: random.Random instance
+    @param bits: number of random bits
+    @return: bytes holding them, bit i is bytes[i // 8] >> (i % 8) & 1
+    """
+    if bits <= 0:
+        return b""
+    return rng.getrandbits(bits).to_bytes((bits + 7) // 8, "little")
+
+
+def _start_cell(rows, cols, start_pos):
+    """
+    @return: the cell of start_pos, (0, 1) if None, or (0, 0) when the
+             grid has a single col
+    """
+    if start_pos is None:
+        start_pos = (0, min(1, cols - 1))
+    return start_pos[0] * cols + start_pos[1]
+
+
+@register_generator("dfs")
+def dfs_backtracker(rows, cols, seed=None, start_pos=None):
+    """
+    randomized dfs backtracker over a rows x cols grid
+    @param rows: grid rows
+    @param cols: grid cols
+    @param seed: int seed or a random.Random instance
+    @param start_pos: [row, col] that the carving starts from, the
+                      entry of the grid if None
+    @return: the carved MazeGrid
+    """
+    rng = make_rng(seed)
+    grid = MazeGrid(rows, cols)
+    h_walls = grid.h_walls
+    v_walls = grid.v_walls
+    visited = bytearray(rows * cols)
+    last_row = rows - 1
+    last_col = cols - 1
+
+    start = _start_cell(rows, cols, start_pos)
+    visited[start] = 1
+    stack = [start]
+    while stack:
+        current = stack[-1]
+        row, col = divmod(current, cols)
+
+        neighbor = []
+        if row < last_row and not visited[current + cols]:
+            neighbor.append(current + cols)
+        if row > 0 and not visited[current - cols]:
+            neighbor.append(current - cols)
+        if col < last_col and not visited[current + 1]:
+            neighbor.append(current + 1)
+        if col > 0 and not visited[current - 1]:
+            neighbor.append(current - 1)
+
+        if not neighbor:
+            stack.pop()
+            continue
+
+        next_cell = neighbor[rng.randrange(0, len(neighbor))]
+        visited[next_cell] = 1
+        # break the wall between current and next_cell
+        if next_cell == current + cols:
+            h_walls[current] = 0
+        elif next_cell == current - cols:
+            h_walls[next_cell] = 0
+        elif next_cell == current + 1:
+            v_walls[current - row] = 0
+        else:
+            v_walls[next_cell - row] = 0
+        stack.append(next_cell)
+
+    return grid
+
+
+@register_generator("kruskal")
+def kruskal(rows, cols, seed=None):
+    """
+    randomized kruskal: break shuffled walls whose cells are not joined yet,
+    joined cells are tracked by a union-find with path halving
+    @param rows: grid rows
+    @param cols: grid cols
+    @param seed: int seed or a random.Random instance
+    @return: the carved MazeGrid
+    """
+    rng = make_rng(seed)
+    grid = MazeGrid(rows, cols)
+    h_count = len(grid.h_walls)
+    parent = list(range(rows * cols))
+
+    edges = list(range(h_count + len(grid.v_walls)))
+    rng.shuffle(edges)
+    joins = rows * cols - 1
+    for edge in edges:
+        if not joins:
+            break
+        if edge < h_count:
+            cell1 = edge
+            cell2 = edge + cols
+        else:
+            cell1 = edge - h_count
+            cell1 += cell1 // (cols - 1)
+            cell2 = cell1 + 1
+
+        while parent[cell1] != cell1:
+            parent[cell1] = parent[parent[cell1]]
+            cell1 = parent[cell1]
+        while parent[cell2] != cell2:
+            parent[cell2] = parent[parent[cell2]]
+            cell2 = parent[cell2]
+        if cell1 == cell2:
+            continue
+
+        parent[cell2] = cell1
+        joins -= 1
+        if edge < h_count:
+            grid.h_walls[edge] = 0
+        else:
+            grid.v_walls[edge - h_count] = 0
+
+    return grid
+
+
+@register_generator("prim")
+def prim(rows, cols, seed=None, start_pos=None):
+    """
+    randomized prim: grow the maze from start_pos by breaking a random
+    wall on its frontier
+    @param rows: grid rows
+    @param cols: grid cols
+    @param seed: int seed or a random.Random instance
+    @param start_pos: [row, col] that the carving starts from, the
+                      entry of the grid if None
+    @return: the carved MazeGrid
+    """
+    rng = make_rng(seed)
+    grid = MazeGrid(rows, cols)
+    in_maze = bytearray(rows * cols)
+    last_row = rows - 1
+    last_col = cols - 1
+
+    frontier = []   # (cell in the maze, cell out of it)
+    cell = _start_cell(rows, cols, start_pos)
+    while True:
+        in_maze[cell] = 1
+        row, col = divmod(cell, cols)
+        if row < last_row and not in_maze[cell + cols]:
+            frontier.append((cell, cell + cols))
+        if row > 0 and not in_maze[cell - cols]:
+            frontier.append((cell, cell - cols))
+        if col < last_col and not in_maze[cell + 1]:
+            frontier.append((cell, cell + 1))
+        if col > 0 and not in_maze[cell - 1]:
+            frontier.append((cell, cell - 1))
+
+        cell = None
+        while frontier:
+            # swap-remove a random frontier wall
+            pick = rng.randrange(0, len(frontier))
+            frontier[pick], frontier[-1] = frontier[-1], frontier[pick]
+            current, next_cell = frontier.pop()
+            if not in_maze[next_cell]:
+                grid.break_wall(current, next_cell)
+                cell = next_cell
+                break
+        if cell is None:
+            return grid
+
+
+def eller_rows(rows, cols, seed=None):
+    """
+    eller's algorithm, one row at a time with O(cols) state
+    @param rows: grid rows
+    @param cols: grid cols
+    @param seed: int seed or a random.Random instance
+    @return: generator of (v_row, h_row) bytearrays per row, v_row holds
+             the cols - 1 walls inside the row and h_row the cols walls
+             under it (None for the last row), 1 if standing
+    """
+    rng = make_rng(seed)
+    sets = [0] * cols      # set id of each cell in the current row
+    members = {}           # set id -> cols of the current row in that set
+    next_id = 1
+
+    for row in range(rows):
+        last = row == rows - 1
+        for col in range(cols):
+            if not sets[col]:
+                sets[col] = next_id
+                members[next_id] = [col]
+                next_id += 1
+
+        # join neighbors in the row, always on the last row
+        v_row = bytearray(b'\x01') * (cols - 1)
+        for col in range(cols - 1):
+            left = sets[col]
+            right = sets[col + 1]
+            if left == right or not (last or rng.random() < 0.5):
+                continue
+            v_row[col] = 0
+            if len(members[left]) < len(members[right]):
+                left, right = right, left
+            for member in members[right]:
+                sets[member] = left
+            members[left].extend(members.pop(right))
+
+        if last:
+            yield v_row, None
+            return
+
+        # every set goes down at least once
+        h_row = bytearray(b'\x01') * cols
+        below = [0] * cols
+        below_members = {}
+        for set_id, cells in members.items():
+            down = [col for col in cells if rng.random() < 0.5]
+            if not down:
+                down = [cells[rng.randrange(0, len(cells))]]
+            for col in down:
+                h_row[col] = 0
+                below[col] = set_id
+            below_members[set_id] = down
+        sets = below
+        members = below_members
+
+        yield v_row, h_row
+
+
+@register_generator("eller")
+def eller(rows, cols, seed=None):
+    """
+    eller's algorithm collected into a MazeGrid, see eller_rows to stream
+    the rows instead
+    @param rows: grid rows
+    @param cols: grid cols
+    @param seed: int seed or a random.Random instance
+    @return: the carved MazeGrid
+    """
+    grid = MazeGrid(rows, cols)
+    v_width = cols - 1
+    for row, (v_row, h_row) in enumerate(eller_rows(rows, cols, seed)):
+        grid.v_walls[row * v_width:(row + 1) * v_width] = v_row
+        if h_row is not None:
+            grid.h_walls[row * cols:(row + 1) * cols] = h_row
+    return grid
+
+
+@register_generator("binary_tree")
+def binary_tree(rows, cols, seed=None):
+    """
+    binary tree: every cell breaks its north or west wall, vectorized with
+    numpy when it is installed; one random bit per cell picks the wall
+    @param rows: grid rows
+    @param cols: grid cols
+    @param seed: int seed or a random.Random instance
+    @return: the carved MazeGrid
+    """
+    rng = make_rng(seed)
+    grid = MazeGrid(rows, cols)
+    flips = random_bytes(rng, rows * cols)
+
+    if np is not None:
+        north = np.unpackbits(np.frombuffer(flips, np.uint8),
+                              bitorder="little")[:rows * cols]
+        north = north.reshape(rows, cols) == 1
+        north[:, 0] = True     # the first column can only go north
+        north[0, :] = False    # the first row can only go west
+        west = ~north
+        west[:, 0] = False
+        grid.h_walls = bytearray((~north[1:, :]).astype(np.uint8).tobytes())
+        grid.v_walls = bytearray((~west[:, 1:]).astype(np.uint8).tobytes())
+        return grid
+
+    for row in range(rows):
+        for col in range(cols):
+            cell = row * cols + col
+            if row and (not col or flips[cell >> 3] >> (cell & 7) & 1):
+                grid.h_walls[cell - cols] = 0
+            elif col:
+                grid.v_walls[cell - row - 1] = 0
+    return grid
+
+
+@register_generator("sidewinder")
+def sidewinder(rows, cols, seed=None):
+    """
+    sidewinder: the first row is one corridor, every other row is cut into
+    runs that each break one north wall, vectorized with numpy when it is
+    installed; one random bit per cell closes a run, then a 32-bit word
+    per run picks its north wall
+    @param rows: grid rows
+    @param cols: grid cols
+    @param seed: int seed or a random.Random instance
+    @return: the carved MazeGrid
+    """
+    rng = make_rng(seed)
+    grid = MazeGrid(rows, cols)
+    grid.v_walls[0:cols - 1] = bytes(cols - 1)
+    cells = (rows - 1) * cols
+    flips = random_bytes(rng, cells)
+
+    if np is not None:
+        close = np.unpackbits(np.frombuffer(flips, np.uint8),
+                              bitorder="little")[:cells]
+        close = close.reshape(rows - 1, cols) == 1
+        close[:, -1] = True     # runs never cross the east border
+        ends = np.flatnonzero(close)
+        starts = np.empty_like(ends)
+        starts[0:1] = 0
+        starts[1:] = ends[:-1] + 1
+        words = np.frombuffer(random_bytes(rng, 32 * len(ends)), "<u4")
+        chosen = starts + ((words.astype(np.uint64)
+                            * (ends - starts + 1).astype(np.uint64))
+                           >> np.uint64(32)).astype(ends.dtype)
+        h_walls = np.ones(cells, dtype=np.uint8)
+        h_walls[chosen] = 0
+        grid.h_walls = bytearray(h_walls.tobytes())
+        grid.v_walls[cols - 1:] = close[:, :-1].astype(np.uint8).tobytes()
+        return grid
+
+    runs = sum(flips[cell >> 3] >> (cell & 7) & 1 for cell in range(cells)
+               if cell % cols != cols - 1) + rows - 1
+    words = random_bytes(rng, 32 * runs)
+    run = 0
+    for row in range(1, rows):
+        run_start = 0
+        for col in range(cols):
+            cell = (row - 1) * cols + col
+            if col == cols - 1 or flips[cell >> 3] >> (cell & 7) & 1:
+                word = int.from_bytes(words[4 * run:4 * run + 4], "little")
+                north = run_start + (word * (col - run_start + 1) >> 32)
+                grid.h_walls[(row - 1) * cols + north] = 0
+                run_start = col + 1
+                run += 1
+            else:
+                grid.v_walls[row * (cols - 1) + col] = 0
+    return grid
@@ -0,0 +1,197 @@
+# !python3
+# coding=utf-8
+
+"""
+Pure-data maze model for the maze runner game.
+
+A maze is two edge grids of one byte per wall segment, so generation,
+solving and collision can all run without pygame or a display.
+Sprites and surfaces are only built from it at render time.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+
+# ------------------ Class Definition ------------------ #
+
+class MazeGrid(object):
+    """
+    compact maze model, cells are addressed by row * cols + col
+    h_walls[row * cols + col]: the wall under (row, col), 1 if standing
+    v_walls[row * (cols - 1) + col]: the wall right of (row, col)
+    """
+
+    def __init__(self, rows, cols, entry=None, exit_pos=None):
+        """
+        constructor init, every wall is standing
+        @param rows: grid rows
+        @param cols: grid cols
+        @param entry: (row, col) that mumu starts from, (0, 1) if None,
+                      (0, 0) on a single col
+        @param exit_pos: (row, col) of the princess, the bottom-right
+                         road next to the corner if None
+        """
+        self.rows = rows
+        self.cols = cols
+        if entry is None:
+            entry = (0, min(1, cols - 1))
+        self.entry = tuple(entry)
+        if exit_pos is None:
+            exit_pos = (rows - 1, max(cols - 2, 0))
+        self.exit = tuple(exit_pos)
+        self.h_walls = bytearray(b'\x01') * ((rows - 1) * cols)
+        self.v_walls = bytearray(b'\x01') * (rows * (cols - 1))
+        self.version = 0    # bumped by every wall change, for caches
+
+    @classmethod
+    def from_road_mat(cls, road_mat):
+        """
+        build an uncarved grid from a game road matrix
+        @param road_mat: matrix with 0 at the entry and -1 at the exit
+        @return: the MazeGrid
+        """
+        rows = len(road_mat)
+        cols = len(road_mat[0])
+        entry = None
+        exit_pos = None
+        for row, line in enumerate(road_mat):
+            if entry is None and 0 in line:
+                entry = (row, line.index(0))
+            if exit_pos is None and -1 in line:
+                exit_pos = (row, line.index(-1))
+        return cls(rows, cols, entry or (0, 1), exit_pos)
+
+    @property
+    def cells(self):
+        return self.rows * self.cols
+
+    def index(self, pos):
+        """
+        @param pos: (row, col)
+        @return: the flat cell index
+        """
+        return pos[0] * self.cols + pos[1]
+
+    def position(self, cell):
+        """
+        @param cell: flat cell index
+        @return: (row, col)
+        """
+        return divmod(cell, self.cols)
+
+    def _slot(self, cell1, cell2):
+        """
+        locate the wall between two adjacent cells
+        @return: (edge grid, index in that grid)
+        """
+        if cell1 > cell2:
+            cell1, cell2 = cell2, cell1
+        if cell2 - cell1 == self.cols:
+            return self.h_walls, cell1
+        if cell2 - cell1 == 1 and cell2 % self.cols:
+            return self.v_walls, cell1 - cell1 // self.cols
+        raise ValueError("cells %d and %d are not adjacent" % (cell1, cell2))
+
+    def has_wall(self, cell1, cell2):
+        """
+        @return: True if the wall between the two cells is standing
+        """
+        walls, index = self._slot(cell1, cell2)
+        return walls[index] == 1
+
+    def break_wall(self, cell1, cell2):
+        """
+        break the wall between two adjacent cells
+        """
+        walls, index = self._slot(cell1, cell2)
+        walls[index] = 0
+        self.version += 1
+
+    def build_wall(self, cell1, cell2):
+        """
+        build the wall between two adjacent cells again
+        """
+        walls, index = self._slot(cell1, cell2)
+        walls[index] = 1
+        self.version += 1
+
+    def open_neighbors(self, cell):
+        """
+        @param cell: flat cell index
+        @return: the cells reachable from cell in one step
+        """
+        cols = self.cols
+        row, col = divmod(cell, cols)
+        neighbor = []
+        if row < self.rows - 1 and not self.h_walls[cell]:
+            neighbor.append(cell + cols)
+        if row > 0 and not self.h_walls[cell - cols]:
+            neighbor.append(cell - cols)
+        if col < cols - 1 and not self.v_walls[cell - row]:
+            neighbor.append(cell + 1)
+        if col > 0 and not self.v_walls[cell - row - 1]:
+            neighbor.append(cell - 1)
+        return neighbor
+
+    def reachable(self, start=None, goal=None):
+        """
+        breadth-first search over the broken walls, linear in cells
+        @param start: (row, col), the entry if None
+        @param goal: (row, col), the exit if None
+        @return: True if goal can be reached from start
+        """
+        start = self.index(self.entry if start is None else start)
+        goal = self.index(self.exit if goal is None else goal)
+        seen = bytearray(self.cells)
+        seen[start] = 1
+        queue = [start]
+        for cell in queue:
+            if cell == goal:
+                return True
+            for next_cell in self.open_neighbors(cell):
+                if not seen[next_cell]:
+                    seen[next_cell] = 1
+                    queue.append(next_cell)
+        return False
+
+    def wall_count(self):
+        """
+        @return: the number of standing walls
+        """
+        return self.h_walls.count(1) + self.v_walls.count(1)
+
+    def wall_table_size(self):
+        """
+        @return: the length of Maze.wall_table for this grid
+        """
+        return len(self.h_walls) + len(self.v_walls)
+
+    def wall_table_flag(self, location):
+        """
+        @param location: index in Maze.wall_table
+        @return: 1 if that wall is standing, else 0
+        """
+        offset = len(self.h_walls)
+        if location < offset:
+            return self.h_walls[location]
+        col, row = divmod(location - offset, self.rows)
+        return self.v_walls[row * (self.cols - 1) + col]
+
+    def standing_walls(self):
+        """
+        iterate the standing walls in Maze.wall_table order
+        @return: generator of (wall_table index, mode, row, col),
+                 mode 1 is the wall under (row, col),
+                 mode 2 is the wall right of (row, col)
+        """
+        rows = self.rows
+        cols = self.cols
+        for index, standing in enumerate(self.h_walls):
+            if standing:
+                row, col = divmod(index, cols)
+                yield index, 1, row, col
+        offset = len(self.h_walls)
+        for col in range(cols - 1):
+            for row in range(rows):
+                if self.v_walls[row * (cols - 1) + col]:
+                    yield offset + col * rows + row, 2, row, col
@@ -11,10 +11,30 @@ for the Programming Course Design.
 """
 
 # ------------------ Lib Import ------------------ #
+from startup import Loader, since_launch    # first, it starts the clock
 import pygame
 import math
+import os
 import random
-from openpyxl import load_workbook
+import time
+
+from assets import assets
+from audio import audio
+from camera import Camera
+from collision import GridCollider
+from editing import set_wall
+from engine import DOWN, GameState, LEFT, RIGHT, TICK_RATE, UP
+from fonts import clear_cache as clear_font_cache, get_font, render_text
+from generators import dfs_backtracker, make_rng
+from grid import MazeGrid
+from mazefile import load as load_maze
+from placement import add_teachers, choose_teacher_cells
+from profiler import FrameProfiler
+from questions import QuestionBank
+from render import draw_view
+from scenes import PageScene, SceneStack
+from solver import distance_field
+from timestep import FixedTimestep
 
 # ------------------ Color Definition ------------------ #
 BLACK = (0, 0, 0)
@@ -33,10 +53,28 @@ WALL_THICKNESS = 6
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 
-blood = 100
+# maze size in cells, the camera scrolls when it is larger than the screen
+MAZE_ROWS = 12
+MAZE_COLS = 16
+MAZE_SEED = None    # int to replay a maze, None for a new one every launch
+TEACHER_COUNT = 15
+TEACHER_SPACING = 2     # cells between two teachers, see placement.py
+
+blood = 100     # blood at the start of a game
+
+HINT_STEPS = 5      # cells shown for a right answer
+HINT_TICKS = 180    # game ticks the hint stays on screen
 
 done = False  # main-loop flag
 
+FPS = 60        # most frames drawn per second, 0 for no cap
+PAGE_FPS = 30   # frame rate while a dialog or story page is shown
+
+# every frame goes to that .csv or .json file at exit when set, for
+# example "frame_trace.csv"; F3 toggles the frame time overlay
+PROFILE_TRACE_PATH = None
+PROFILE_REFRESH = 15    # frames between two overlay updates
+
 # ---------------- Resource Data Path ------------------ #
 FONT_PATH = "../data/font/msyh.ttc"
 TEACHER_IMAGE_PATH = "../data/pic/ds_30.jpg"
@@ -48,6 +86,34 @@ RIGHT_ANSWER_MUSIC_PATH = "../data/music/right.mp3"
 WRONG_ANSWER_MUSIC_PATH = "../data/music/wrong.mp3"
 LOSE_GAME_MUSIC_PATH = "../data/music/lose.mp3"
 VICTORY_MUSIC_PATH = "../data/music/victory.ogg"
+# written by mazefile.py, the maze is carved at startup when it is missing
+MAZE_FILE_PATH = "../data/maze/level.maze"
+
+# decoded once by the asset manager before the first frame
+PRELOAD_IMAGE_PATHS = [TEACHER_IMAGE_PATH, PLAYER_IMAGE_PATH,
+                       PRINCESS_IMAGE_PATH]
+# decoded on loader threads by the audio manager, the tracks crossfade
+# with the background music
+PRELOAD_SOUND_PATHS = [RIGHT_ANSWER_MUSIC_PATH, WRONG_ANSWER_MUSIC_PATH,
+                       LOSE_GAME_MUSIC_PATH, VICTORY_MUSIC_PATH]
+
+# ------------------ Key Binding ------------------ #
+KEY_DIRECTIONS = {
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+}
+ANSWER_KEYS = {     # key -> answer of a question, ESC gives up
+    pygame.K_a: 'A',
+    pygame.K_b: 'B',
+    pygame.K_c: 'C',
+    pygame.K_d: 'D',
+    pygame.K_ESCAPE: ' ',
+}
+SKIP_KEYS = {pygame.K_SPACE: None, pygame.K_RETURN: None}   # story pages
+QUIT_KEYS = {pygame.K_ESCAPE: None}     # end pages
+PROFILE_KEY = pygame.K_F3
 
 
 # ------------------ Class Definition ------------------ #
@@ -56,19 +122,23 @@ class Maze(object):
     """
     maze class
     """
-    def __init__(self):
+    def __init__(self, seed=None):
         """
         constructor init
+        @param seed: int seed or a random.Random instance driving the
+                     carving, the same seed carves the same maze
         """
-        self.neighbor = []
-        self.visited = []
-        self.unvisited = []
+        self.rng = make_rng(seed)
+        self.visited = bytearray()  # flags indexed by row * cols + col
         self.wall_table = []
         self.road_mat = []
+        self.exit_pos = None
+        self.grid = None    # the pure-data MazeGrid behind the sprites
 
     def maze_generate(self, road_list, wall_list):
         """
-        generate the road, wall from road list
+        generate the road, wall sprites from road list and the maze grid,
+        only the standing walls of the grid get a sprite
         @param road_list: road sprite group
         @param wall_list: wall sprite group
         @return: road_list, wall_list
@@ -81,94 +151,94 @@ class Maze(object):
                 if self.road_mat[row][col] == 1:
                     road = Road(ROAD_THICKNESS * col, ROAD_THICKNESS * row)
                     road_list.add(road)
-                # get in all the matrix points
-                self.unvisited.append([row, col])
+
+        if self.grid is None:   # not carved yet, every wall is standing
+            self.grid = MazeGrid.from_road_mat(self.road_mat)
+            # no matrix point has been visited yet
+            self.visited = bytearray(rows * cols)
 
         # wall maze drawing
-        for row_inv in range(1, rows):
-            for col_inv in range(0, cols):
-                wall = Wall(col_inv * ROAD_THICKNESS,
-                            row_inv * ROAD_THICKNESS - WALL_THICKNESS / 2, 1)
-                wall_list.add(wall)
-                self.wall_table.append(wall)
-        for col_inv in range(1, cols):
-            for row_inv in range(0, rows):
-                wall = Wall(col_inv * ROAD_THICKNESS - WALL_THICKNESS / 2,
-                            row_inv * ROAD_THICKNESS, 2)
-                wall_list.add(wall)
-                self.wall_table.append(wall)
+        self.wall_table = [None] * self.grid.wall_table_size()
+        for location, mode, row, col in self.grid.standing_walls():
+            if mode == 1:
+                wall = Wall(col * ROAD_THICKNESS,
+                            (row + 1) * ROAD_THICKNESS - WALL_THICKNESS / 2,
+                            1)
+            else:
+                wall = Wall((col + 1) * ROAD_THICKNESS - WALL_THICKNESS / 2,
+                            row * ROAD_THICKNESS, 2)
+            wall_list.add(wall)
+            self.wall_table[location] = wall
 
         return road_list, wall_list
 
+    def find_exit(self):
+        """
+        find the exit (the -1 point in road_mat) once and cache it
+        @return: [row, col] of the exit, None if there is no exit
+        """
+        if self.exit_pos is None:
+            for row_mat, line in enumerate(self.road_mat):
+                if -1 in line:
+                    self.exit_pos = [row_mat, line.index(-1)]
+                    break
+        return self.exit_pos
+
     def isexit(self, pos_now):     # row&col start from 0
         """
         test if the pos_now is the exit
         @param pos_now: the position remaining to be tested
         @return: flag-the bool variable
         """
+        exit_pos = self.find_exit()
+        return exit_pos is not None \
+            and exit_pos[0] == pos_now[0] and exit_pos[1] == pos_now[1]
+
+    def dfs_maze_generate(self, start_pos, wall_list=None):
+        """
+        dfs algorithm to carve the maze grid
+        @param start_pos: the position that mumu is ready to go
+        @param wall_list: wall group built by maze_generate beforehand,
+                          its broken walls get removed; None to carve the
+                          grid only and build the sprites afterwards
+        @return: if the maze is good to run, return wall_list (the grid
+                 when wall_list is None), else return False
+        """
+        rows = len(self.road_mat)
+        cols = len(self.road_mat[0])
 
-        flag = False
-        row = pos_now[0]
-        col = pos_now[1]
-        # find the exit
-        exit_row = 0
-        exit_col = 0
+        exit_pos = self.find_exit()
+        if exit_pos is None:
+            return False
 
-        for row_mat in range(len(self.road_mat)):
-            for col_mat in range(len(self.road_mat[0])):
-                if self.road_mat[row_mat][col_mat] == -1:
-                    exit_row = row_mat
-                    exit_col = col_mat
+        grid = dfs_backtracker(rows, cols, self.rng, start_pos)
+        grid.entry = tuple(start_pos)
+        grid.exit = tuple(exit_pos)
+        # a dfs spanning tree always reaches the exit, check it in O(cells)
+        if not grid.reachable():
+            return False
+        self.grid = grid
+        self.visited = bytearray(b'\x01') * (rows * cols)
 
-        if exit_row == row and exit_col == col:
-            flag = True
+        if wall_list is None:
+            return grid
+        for location, wall in enumerate(self.wall_table):
+            if wall is not None and not grid.wall_table_flag(location):
+                wall_list.remove(wall)
+                self.wall_table[location] = None
 
-        return flag
+        return wall_list
 
-    def dfs_maze_generate(self, start_pos, wall_list):
+    def hint(self, pos_now, steps):
         """
-        dfs algorithm to generate the wall group
-        @param start_pos: the position that mumu is ready to go
-        @param wall_list: wall group remaining to change
-        @return: if the maze is good to run, return wall_list,
-                 else return False
-        """
-        self.unvisited.remove(start_pos)
-        # maze.visited add the start_pos and remove the start_pos in unvisited
-        self.visited.append(start_pos)
-        current_stack = [start_pos]
-
-        find = False
-        while self.unvisited:
-            next_pos = self.neighbor_select(start_pos)
-
-            if not next_pos:
-                if current_stack:
-                    start_pos = current_stack.pop()
-                else:
-                    start_pos = self.unvisited[
-                        random.randrange(0, len(self.unvisited))]
-                continue
-
-            current_stack.append(next_pos)
-
-            self.road_mat[next_pos[0]][next_pos[1]] = 0
-            self.visited.append(next_pos)
-            self.unvisited.remove(next_pos)
-            wall_list = self.wall_break(start_pos, next_pos, wall_list)
-
-            if not wall_list:
-                return False
-
-            if self.isexit(next_pos):
-                find = True
-
-            start_pos = next_pos
-            # dfs_maze_generate(next_pos, maze, maze_matrix)
-        if find:
-            return wall_list
-        else:
-            return False
+        the next steps from pos_now toward the exit, read from the
+        distance field cached for this maze
+        @param pos_now: [row, col] the player stands on
+        @param steps: the most cells to return
+        @return: list of (row, col), empty at the exit
+        """
+        path = distance_field(self.grid).path_from(pos_now, steps + 1)
+        return path[1:] if path else []
 
     def neighbor_select(self, pos_now):
         """
@@ -177,32 +247,26 @@ class Maze(object):
         @return: the neighbor position
         """
 
-        row = len(self.road_mat)
-        col = len(self.road_mat[0])
+        rows = len(self.road_mat)
+        cols = len(self.road_mat[0])
         row_now = pos_now[0]
         col_now = pos_now[1]
-        # judge the up&down tag comparision
-        tag_up_down = row_now * col + col_now
-        # judge the left&right tag comparision
-        tag_left_right = col_now * row + row_now
+        tag = row_now * cols + col_now  # index in the visited flags
         neighbor = []
 
-        if tag_up_down + col <= row * col + col \
-                and [row_now + 1, col_now] in self.unvisited:
+        if row_now + 1 < rows and not self.visited[tag + cols]:
             neighbor.append([row_now + 1, col_now])
-        if tag_up_down - col >= 0 and [row_now - 1, col_now] in self.unvisited:
+        if row_now > 0 and not self.visited[tag - cols]:
             neighbor.append([row_now - 1, col_now])
-        if tag_left_right + row <= row * col + col \
-                and [row_now, col_now + 1] in self.unvisited:
+        if col_now + 1 < cols and not self.visited[tag + 1]:
             neighbor.append([row_now, col_now + 1])
-        if tag_left_right - row >= 0 \
-                and [row_now, col_now - 1] in self.unvisited:
+        if col_now > 0 and not self.visited[tag - 1]:
             neighbor.append([row_now, col_now - 1])
 
         if not neighbor:
             return False
 
-        return neighbor[random.randrange(0, len(neighbor))]
+        return neighbor[self.rng.randrange(0, len(neighbor))]
 
     def wall_break(self, pos1, pos2, wall_list):
         """
@@ -228,7 +292,12 @@ class Maze(object):
             elif pos1[0] - pos2[0] == -1:
                 location = pos1[0] * cols + pos1[1]
         try:
-            wall_list.remove(self.wall_table[location])
+            if self.grid is not None:
+                # the cached distance fields follow the broken wall
+                set_wall(self.grid, pos1, pos2, False)
+            if self.wall_table[location] is not None:
+                wall_list.remove(self.wall_table[location])
+                self.wall_table[location] = None
             return wall_list
         except Exception as e:
             print("wall_remove error!" + str(Exception) + str(e))
@@ -300,7 +369,7 @@ class Player(pygame.sprite.Sprite):
 
         super().__init__()  # inherited
 
-        self.image = pygame.image.load(PLAYER_IMAGE_PATH)
+        self.image = assets.image(PLAYER_IMAGE_PATH)
         # image/rect are the properties of the sprite class
         self.rect = self.image.get_rect()   # top left corner location
         self.rect.y = y
@@ -323,10 +392,18 @@ class Player(pygame.sprite.Sprite):
     def move(self, walls):
         """
         move the player
-        @param walls: the wall group that player cannot craw out
+        @param walls: the GridCollider (or the wall group) that player
+                      cannot craw out
         @return: none
         """
 
+        if isinstance(walls, GridCollider):
+            # only the walls around the player's cells are tested
+            self.rect.x, self.rect.y = walls.move(
+                self.rect.x, self.rect.y, self.rect.width, self.rect.height,
+                self.change_x, self.change_y)
+            return
+
         # first left/right then up/down
 
         # moving left/right
@@ -375,28 +452,220 @@ class Teacher(pygame.sprite.Sprite):
         constructor function
         """
         super().__init__()
-        self.image = pygame.image.load(TEACHER_IMAGE_PATH).convert()
+        self.image = assets.image(TEACHER_IMAGE_PATH)   # shared surface
         self.rect = self.image.get_rect()  # top-left corner location
 
 
+class GameView(object):
+    """
+    draws the frames of a running game: the static view (background,
+    princess, walls) only when the camera scrolls or a wall changes, then
+    the teachers, the hint, the player, the HUD and the profile overlay
+    over it, redrawing only what moved
+    """
+
+    def __init__(self, size, grid, player, static_images=()):
+        """
+        constructor init
+        @param size: (width, height) of the screen
+        @param grid: the MazeGrid drawn
+        @param player: the Player sprite
+        @param static_images: list of (surface, (x, y)) in world pixels
+        """
+        self.grid = grid
+        self.player = player
+        self.static_images = static_images
+        self.static_layer = pygame.Surface(size).convert()
+        self.static_key = None  # (camera offset, grid version) drawn
+        self.full_redraw = True     # the whole screen is stale
+        self.moving = pygame.sprite.RenderUpdates(player)
+        self.teachers = pygame.sprite.RenderUpdates()
+        self.teacher_sprites = {}   # teacher id in the state -> sprite
+        self.hint_rects = []
+        self.hud_rect = pygame.Rect(0, 0, 0, 0)
+        self.hud_blood = None
+        self.hud_text = None
+        self.profile_rect = pygame.Rect(0, 0, 0, 0)
+        self.profile_overlay = None
+
+    def add_teacher(self, teacher_id):
+        """
+        @param teacher_id: id of the teacher in the GameState
+        """
+        tea = Teacher()
+        self.teachers.add(tea)
+        self.teacher_sprites[teacher_id] = tea
+
+    def remove_teacher(self, teacher_id):
+        """
+        @param teacher_id: id of a teacher hit by the player
+        """
+        self.teacher_sprites.pop(teacher_id).kill()
+
+    def draw(self, screen, state, camera, alpha=1.0, hint_path=(),
+             profiler=None, show_profile=False):
+        """
+        draw one frame, the camera follows the player
+        @param screen: the screen surface
+        @param state: the GameState
+        @param camera: the Camera
+        @param alpha: the stepper alpha, the player is drawn between the
+                      last two ticks
+        @param hint_path: (row, col) of the hint dots, none if empty
+        @param profiler: the FrameProfiler, its laps are taken if given
+        @param show_profile: draw the profile overlay of the profiler
+        @return: the dirty rects, None if the whole screen changed
+        """
+        player = self.player
+        player_x, player_y = state.player_position(alpha)
+        camera.follow(player_x, player_y,
+                      state.player_width, state.player_height)
+        # the static view, keyed on the camera and the walls (edits bump
+        # the grid version)
+        if (camera.offset, self.grid.version) != self.static_key:
+            draw_view(self.static_layer, self.grid, camera, ROAD_THICKNESS,
+                      WALL_THICKNESS, WARM_GREY, BLACK, self.static_images)
+            for teacher_id, tea in self.teacher_sprites.items():
+                tea.rect.topleft = camera.to_screen(
+                    *state.teachers[teacher_id][:2])
+            self.static_key = (camera.offset, self.grid.version)
+            self.full_redraw = True
+        if profiler is not None:
+            profiler.lap("view")
+        player.rect.topleft = camera.to_screen(player_x, player_y)
+
+        # restore the static layer under everything drawn last frame
+        static_layer = self.static_layer
+        dirty_rects = self.hint_rects + [self.hud_rect, self.profile_rect]
+        if self.full_redraw:
+            screen.blit(static_layer, (0, 0))
+        else:
+            self.moving.clear(screen, static_layer)
+            self.teachers.clear(screen, static_layer)
+            for rect in dirty_rects:
+                screen.blit(static_layer, rect, rect)
+
+        dirty_rects += self.teachers.draw(screen)
+        self.hint_rects = []
+        for row, col in hint_path:
+            center = camera.to_screen(
+                col * ROAD_THICKNESS + ROAD_THICKNESS // 2,
+                row * ROAD_THICKNESS + ROAD_THICKNESS // 2)
+            self.hint_rects.append(
+                pygame.draw.circle(screen, WARM_YELLOW, center, 6))
+        dirty_rects += self.hint_rects
+        dirty_rects += self.moving.draw(screen)
+
+        # text on screen, only rendered again when blood changes
+        if self.hud_blood != state.blood:
+            self.hud_blood = state.blood
+            self.hud_text = render_text("Blood: " + str(self.hud_blood), 30,
+                                        RED, FONT_PATH, sys_font=True)
+        self.hud_rect = screen.blit(self.hud_text, [0, 0])
+        dirty_rects.append(self.hud_rect)
+
+        # frame time overlay, its text is refreshed a few times a second
+        self.profile_rect = pygame.Rect(0, 0, 0, 0)
+        if show_profile and profiler is not None:
+            if self.profile_overlay is None \
+                    or profiler.frames % PROFILE_REFRESH == 0:
+                self.profile_overlay = render_profile(profiler.lines() + [
+                    "sprites  %d" % (len(self.teachers) + len(self.moving))])
+            self.profile_rect = screen.blit(
+                self.profile_overlay,
+                [screen.get_width() - self.profile_overlay.get_width(), 0])
+            dirty_rects.append(self.profile_rect)
+        if profiler is not None:
+            profiler.lap("draw")
+
+        if self.full_redraw:
+            self.full_redraw = False
+            return None
+        return dirty_rects
+
+
 # ------------------ Function Definition ------------------ #
 def display_texts_page(screen, texts, flip=True):
     screen.fill(WARM_GREY)
-    font_wel = pygame.font.Font(FONT_PATH, 20)
     for text_idx, text in enumerate(texts):
-        text_wel = font_wel.render(text, True, BLACK)
+        text_wel = render_text(text, 20, BLACK, FONT_PATH)
         screen.blit(text_wel, [50, 50 + text_idx * 30])
     if flip:
         pygame.display.flip()
 
 
-def welcome(screen_wel):
+def render_profile(lines):
+    """
+    @param lines: the text of the profiling overlay
+    @return: the overlay surface
+    """
+    font = get_font(None, 18)
+    texts = [font.render(line, True, WHITE) for line in lines]
+    overlay = pygame.Surface((max(text.get_width() for text in texts) + 10,
+                              len(texts) * 16 + 10))
+    overlay.fill(BLACK)
+    for text_idx, text in enumerate(texts):
+        overlay.blit(text, [5, 5 + text_idx * 16])
+    return overlay
+
+
+def quit_game(result=None):
     """
-    print the welcome information
-    @param screen_wel: the screen which is ready to make an output
+    end the main loop
+    """
+    global done
+    done = True
+
+
+def load_level():
+    """
+    load the level file, or carve a new maze and choose the teacher
+    cells, run by the loader while the intro shows
+    @return: (the Maze, list of teacher (row, col))
+    """
+    if os.path.exists(MAZE_FILE_PATH):
+        # generated offline, loaded instead of carved
+        saved = load_maze(MAZE_FILE_PATH)
+        grid = saved.grid
+        main_maze = Maze(saved.seed)
+        main_maze.road_mat = [[1] * grid.cols for _ in range(grid.rows)]
+        main_maze.road_mat[grid.entry[0]][grid.entry[1]] = 0
+        main_maze.road_mat[grid.exit[0]][grid.exit[1]] = -1
+        main_maze.grid = grid
+        return main_maze, saved.teachers
+
+    road_mat = [[1] * MAZE_COLS for _ in range(MAZE_ROWS)]
+    # entry point
+    road_mat[0][1] = 0
+    # final_point
+    road_mat[-1][-2] = -1
+
+    # one seed drives the maze and the teachers, print it so a maze
+    # can be played again with MAZE_SEED
+    seed = MAZE_SEED
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    print("maze seed: %d" % seed)
+    main_maze = Maze(seed)
+    main_maze.road_mat = road_mat
+
+    # carve the maze grid in a single pass, a spanning tree always
+    # reaches the exit, the walls are drawn from it by draw_view
+    if not main_maze.dfs_maze_generate([0, 1]):
+        raise RuntimeError("the road matrix has no exit (-1) point")
+    # teachers guard the chokepoints of the way out, never the entry or
+    # the exit, and keep TEACHER_SPACING cells from each other
+    return main_maze, choose_teacher_cells(main_maze.grid, TEACHER_COUNT,
+                                           TEACHER_SPACING, main_maze.rng)
+
+
+def welcome(scenes):
+    """
+    push the welcome pages
+    @param scenes: the SceneStack the pages are shown by
     @return: none
     """
-    texts = [
+    story_texts = [
         "故事发生在名为大数据的王国，",
         "这里的人们以知识和技术为尊，人们享受着新兴技术",
         "给他们带来的生活便利",
@@ -408,10 +677,7 @@ def welcome(screen_wel):
         "王国的驸马。万千勇士收到消息便不及待地踏上了征程，",
         "而这当中就有一位名唤木木的少年……",
     ]
-    display_texts_page(screen_wel, texts)
-    pygame.time.wait(3000)
-
-    texts = [
+    mission_texts = [
         "勇士木木来到了知识迷岛，却发现这座岛比他想象的要",
         "复杂得多，整座岛是一个非常大的迷宫，道路错综复杂，",
         "更麻烦的是重要的关卡还有擅长不同学科的老师的把守，",
@@ -419,134 +685,134 @@ def welcome(screen_wel):
         "考试就可以得到迷宫道路中的提示，找到公主，完成游",
         "戏。反之，则游戏失败。",
     ]
-    display_texts_page(screen_wel, texts, flip=False)
 
-    font_wel = pygame.font.Font(FONT_PATH, 50)
-    text_wel = font_wel.render("木木勇士，冲冲冲！", True, (235, 63, 47))
-    screen_wel.blit(text_wel, [50, 300])
+    def draw_story(screen_wel):
+        display_texts_page(screen_wel, story_texts, flip=False)
 
-    pygame.display.flip()
-    pygame.time.wait(4000)
+    def draw_mission(screen_wel):
+        display_texts_page(screen_wel, mission_texts, flip=False)
+        text_wel = render_text("木木勇士，冲冲冲！", 50, (235, 63, 47),
+                               FONT_PATH)
+        screen_wel.blit(text_wel, [50, 300])
 
+    scenes.push(PageScene(draw_story, 3000, SKIP_KEYS),
+                PageScene(draw_mission, 4000, SKIP_KEYS))
 
-def blood_loss(screen_loss):
+
+def loading(scenes, loader):
     """
-    if mumu get a wrong answer, mumu get blood loss. This prints the output tip
-    @param screen_loss: the screen you are ready to make an output
+    push the page shown until the loader is done, it closes at once if
+    the loader is done by then
+    @param scenes: the SceneStack
+    @param loader: the startup.Loader
     @return: none
     """
-    font_loss = pygame.font.Font(FONT_PATH, 60)
-    text_loss = font_loss.render("你个渣渣", True, RED)
-    screen_loss.blit(text_loss, [100, 100])
-    text_loss = font_loss.render("BLOOD -20~", True, RED)
-    screen_loss.blit(text_loss, [100, 200])
+    def draw_loading(screen_load):
+        display_texts_page(screen_load, ["Loading..."], flip=False)
 
-    pygame.display.flip()
-    pygame.time.wait(700)
+    scenes.push(PageScene(draw_loading, until=loader.done))
 
 
-def answer_right(screen_right):
+def ask_question(scenes, question, on_answer):
     """
-    if mumu get a right answer, mumu get a hint
-    @param screen_right: the screen you are ready to make an output
+    push the question page, waiting for A/B/C/D (ESC gives up)
+    @param scenes: the SceneStack
+    @param question: the Question
+    @param on_answer: callable taking the chosen letter
     @return: none
     """
-    font_right = pygame.font.Font(FONT_PATH, 60)
-    text_right = font_right.render("You're Right~", True, RED)
-    screen_right.blit(text_right, [100, 100])
+    def draw_question(screen):
+        screen.fill(WARM_GREY)
+        text_wb = render_text(question.text, 15, BLACK, FONT_PATH)
+        screen.blit(text_wb, [50, 20])
+        for option_idx, option in enumerate(question.options):
+            text_option = render_text(option, 15, BLACK, FONT_PATH)
+            screen.blit(text_option, [50, 40 + option_idx * 20])
 
-    pygame.display.flip()
-    pygame.time.wait(700)
+    scenes.push(PageScene(draw_question, keys=ANSWER_KEYS,
+                          on_close=on_answer))
 
 
-def lose(screen_lose):
+def blood_loss(scenes):
     """
-    if you lose, you will see this
-    @param screen_lose: the screen you are redy to make an output
-    @return:
+    if mumu get a wrong answer, mumu get blood loss. This shows the tip
+    @param scenes: the SceneStack
+    @return: none
     """
-    global done
-    screen_lose.fill(WARM_GREY)
-
-    pygame.mixer.music.fadeout(500)  # bgm music stop
-    pygame.time.wait(500)
-
-    pygame.mixer.music.load(LOSE_GAME_MUSIC_PATH)
-    pygame.mixer.music.play()
+    def draw_loss(screen_loss):
+        text_loss = render_text("你个渣渣", 60, RED, FONT_PATH)
+        screen_loss.blit(text_loss, [100, 100])
+        text_loss = render_text("BLOOD -20~", 60, RED, FONT_PATH)
+        screen_loss.blit(text_loss, [100, 200])
 
-    font_vic1 = pygame.font.Font(FONT_PATH, 60)
-    font_vic2 = pygame.font.Font(FONT_PATH, 60)
-    font_vic3 = pygame.font.Font(FONT_PATH, 60)
-    font_vic4 = pygame.font.SysFont('TimesNewRoman', 60)
-    text_vic1 = font_vic1.render("Oops~", True, BLACK)
-    text_vic2 = font_vic2.render("看来你的火候还不够", True, BLACK)
-    text_vic3 = font_vic3.render("那就陪公主一起挂科吧~", True, BLACK)
-    text_vic4 = font_vic4.render("Press ESC to quit~ ", True, BLACK)
+    scenes.push(PageScene(draw_loss, 700))
 
-    screen_lose.blit(text_vic1, [100, 100])
-    screen_lose.blit(text_vic2, [100, 200])
-    screen_lose.blit(text_vic3, [100, 300])
-    screen_lose.blit(text_vic4, [100, 400])
 
-    pygame.display.flip()
+def answer_right(scenes):
+    """
+    if mumu get a right answer, mumu get a hint
+    @param scenes: the SceneStack
+    @return: none
+    """
+    def draw_right(screen_right):
+        text_right = render_text("You're Right~", 60, RED, FONT_PATH)
+        screen_right.blit(text_right, [100, 100])
 
-    done = False
-    while not done:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                done = True
-            if event.type == pygame.KEYUP:
-                if event.key == pygame.K_ESCAPE:
-                    done = True
-    pygame.quit()
+    scenes.push(PageScene(draw_right, 700))
 
 
-def victory(screen_vic):
+def lose(scenes):
     """
-    if you have won the game, you will see this hint
-    @param screen_vic: the screen you are willing to make an output
-    @return: none
+    if you lose, you will see this until ESC
+    @param scenes: the SceneStack
+    @return:
     """
-    global done
-    screen_vic.fill(WARM_GREY)
+    audio.crossfade(LOSE_GAME_MUSIC_PATH, 500)     # bgm music out
 
-    pygame.mixer.music.fadeout(1000)    # bgm music stop
-    pygame.time.wait(500)
+    def draw_lose(screen_lose):
+        screen_lose.fill(WARM_GREY)
+        text_vic1 = render_text("Oops~", 60, BLACK, FONT_PATH)
+        text_vic2 = render_text("看来你的火候还不够", 60, BLACK, FONT_PATH)
+        text_vic3 = render_text("那就陪公主一起挂科吧~", 60, BLACK, FONT_PATH)
+        text_vic4 = render_text("Press ESC to quit~ ", 60, BLACK,
+                                'TimesNewRoman', sys_font=True)
 
-    pygame.mixer.music.load(VICTORY_MUSIC_PATH)
-    pygame.mixer.music.play()
+        screen_lose.blit(text_vic1, [100, 100])
+        screen_lose.blit(text_vic2, [100, 200])
+        screen_lose.blit(text_vic3, [100, 300])
+        screen_lose.blit(text_vic4, [100, 400])
 
-    font_vic1 = pygame.font.Font(FONT_PATH, 60)
-    font_vic2 = pygame.font.Font(FONT_PATH, 60)
-    font_vic3 = pygame.font.Font(FONT_PATH, 40)
-    font_vic4 = pygame.font.Font(FONT_PATH, 40)
-    font_vic5 = pygame.font.Font(FONT_PATH, 20)
-    font_vic6 = pygame.font.Font(FONT_PATH, 20)
-    text_vic1 = font_vic1.render("Congratulations!", True, BLACK)
-    text_vic2 = font_vic2.render("你拯救了公主!", True, BLACK)
-    text_vic3 = font_vic3.render("但由于你胆敢觊觎公主的美色，", True, BLACK)
-    text_vic4 = font_vic4.render("国王决定将你处死...", True, BLACK)
-    text_vic5 = font_vic5.render("（原来木木从来都只是国王的工具）", True, BLACK)
-    text_vic6 = font_vic6.render("Press ESC to quit~ ", True, BLACK)
-
-    screen_vic.blit(text_vic1, [100, 100])
-    screen_vic.blit(text_vic2, [100, 200])
-    screen_vic.blit(text_vic3, [100, 300])
-    screen_vic.blit(text_vic4, [100, 350])
-    screen_vic.blit(text_vic5, [100, 400])
-    screen_vic.blit(text_vic6, [100, 470])
-
-    pygame.display.flip()
-
-    done = False
-    while not done:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                done = True
-            if event.type == pygame.KEYUP:
-                if event.key == pygame.K_ESCAPE:
-                    done = True
-    pygame.quit()
+    scenes.push(PageScene(draw_lose, keys=QUIT_KEYS, on_close=quit_game))
+
+
+def victory(scenes):
+    """
+    if you have won the game, you will see this hint until ESC
+    @param scenes: the SceneStack
+    @return: none
+    """
+    audio.crossfade(VICTORY_MUSIC_PATH, 1000)     # bgm music out
+
+    def draw_victory(screen_vic):
+        screen_vic.fill(WARM_GREY)
+        text_vic1 = render_text("Congratulations!", 60, BLACK, FONT_PATH)
+        text_vic2 = render_text("你拯救了公主!", 60, BLACK, FONT_PATH)
+        text_vic3 = render_text("但由于你胆敢觊觎公主的美色，", 40, BLACK,
+                                FONT_PATH)
+        text_vic4 = render_text("国王决定将你处死...", 40, BLACK, FONT_PATH)
+        text_vic5 = render_text("（原来木木从来都只是国王的工具）", 20, BLACK,
+                                FONT_PATH)
+        text_vic6 = render_text("Press ESC to quit~ ", 20, BLACK, FONT_PATH)
+
+        screen_vic.blit(text_vic1, [100, 100])
+        screen_vic.blit(text_vic2, [100, 200])
+        screen_vic.blit(text_vic3, [100, 300])
+        screen_vic.blit(text_vic4, [100, 350])
+        screen_vic.blit(text_vic5, [100, 400])
+        screen_vic.blit(text_vic6, [100, 470])
+
+    scenes.push(PageScene(draw_victory, keys=QUIT_KEYS,
+                          on_close=quit_game))
 
 
 # ------------------ Main Loop ------------------ #
@@ -562,197 +828,213 @@ def main():
     screen = pygame.display.set_mode(size)
     pygame.display.set_caption("期末大作战")
 
-    road_mat_12_16 = [[1]*16 for _ in range(12)]
-    # entry point
-    road_mat_12_16[0][1] = 0
-    # final_point
-    road_mat_12_16[-1][-2] = -1
-
-    main_maze = Maze()
-    main_maze.road_mat = road_mat_12_16
-    player = Player(ROAD_THICKNESS, 0)
-
-    road_list = pygame.sprite.Group()
-    wall_list = pygame.sprite.Group()
-    # generate the initial state
-    main_maze.maze_generate(road_list, wall_list)
-
-    wall_list_dfs = main_maze.dfs_maze_generate([0, 1], wall_list)
-    while not wall_list_dfs:
-        main_maze = Maze()
-        road_list = pygame.sprite.Group()
-        wall_list = pygame.sprite.Group()
-        main_maze.road_mat = road_mat_12_16
-        main_maze.maze_generate(road_list, wall_list)
-        wall_list_dfs = main_maze.dfs_maze_generate([0, 1], wall_list)
-        try:
-            wall_list_dfs.draw(screen)
+    profiler = FrameProfiler(trace=PROFILE_TRACE_PATH is not None)
+    clock = pygame.time.Clock()
+
+    # --------- Background Loading --------- #
+    # everything slow loads on threads while the intro is read, the game
+    # waits on a loading page only if the intro is skipped before
+    loader = Loader()
+    loader.start("level", load_level)
+    # read from the cache, the workbook is parsed only when it changed
+    loader.start("questions", QuestionBank.load, QUESTION_WORKBOOK_PATH)
+    # decode every image once, converted to the display, sounds decode
+    # on threads of the audio manager
+    loader.start("assets", assets.preload, images=PRELOAD_IMAGE_PATHS)
+    audio.preload(PRELOAD_SOUND_PATHS)
+    loader.start("music", pygame.mixer.music.load, BACKGROUND_MUSIC_PATH)
+
+    # dialogs, intro and end pages are scenes ticked by this loop
+    scenes = SceneStack()
+    loading(scenes, loader)
+    welcome(scenes)
+
+    # --------- Intro --------- #
+    global done
+    view = None     # the GameView, once the game is set up
+    dt = 0
+    frame_start = time.perf_counter()
+
+    def tick(fps):
+        """
+        wait for the frame cap, 0 for none
+        @return: milliseconds since the last tick, from perf_counter:
+                 clock.tick() counts whole milliseconds, an uncapped
+                 frame would take 0 and stall the timers
+        """
+        nonlocal frame_start
+        clock.tick(fps)
+        now = time.perf_counter()
+        frame_ms = (now - frame_start) * 1000.0
+        frame_start = now
+        return frame_ms
+
+    def page_frame(events):
+        """
+        one frame of the top page, the game waits under it
+        """
+        nonlocal dt
+        profiler.lap("events")
+        dirty_rects = scenes.tick(events, dt, screen)
+        if view is not None:
+            view.full_redraw = True     # the game is drawn over again
+        profiler.lap("scenes")
+        if dirty_rects is None:
             pygame.display.flip()
-        except Exception as e:
-            print("wall_list_dfs error!" + str(Exception) + str(e))
-            continue
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+        profiler.lap("display")
+        dt = tick(PAGE_FPS)
+        profiler.lap("idle")
+        profiler.end_frame()
+
+    profiler.end_frame()    # the setup is frame 0
+    page_frame([])
+    print("first frame: %.0f ms after launch" % (since_launch() * 1000))
+    while scenes and not done:
+        events = pygame.event.get()
+        for event in events:
+            if event.type == pygame.QUIT:
+                done = True
+        page_frame(events)
+
+    if done:    # closed during the intro
+        loader.wait()   # pygame must outlive the loader threads
+        audio.stop()
+        pygame.quit()
+        clear_font_cache()
+        assets.clear()
+        return
+    main_maze, teacher_cells = loader.result("level")
+    question_bank = loader.result("questions")
+    loader.result("assets")
+    loader.result("music")
+    print("game ready: %.0f ms after launch (%s)" % (
+        since_launch() * 1000, loader.report()))
+
+    # the game rules run on a pygame-free state in world pixels, sprites
+    # follow it in screen pixels through the camera
+    player = Player(0, 0)
+    state = GameState(main_maze.grid, ROAD_THICKNESS, WALL_THICKNESS,
+                      player_size=player.rect.size, blood=blood)
+    camera = Camera(size, state.bounds)
 
-    movingsprites = pygame.sprite.Group()
-    movingsprites.add(player)
+    # --------- Figure Loaded --------- #
+    xiaoxiao_image = assets.image(PRINCESS_IMAGE_PATH)
 
-    # Teacher Section
-    teacher_list = pygame.sprite.Group()
-    for i in range(15):
-        tea = Teacher()
-        tea.rect.x = random.randrange(
-            ROAD_THICKNESS, SCREEN_WIDTH - ROAD_THICKNESS, 50)
-        tea.rect.y = random.randrange(
-            ROAD_THICKNESS, SCREEN_HEIGHT - ROAD_THICKNESS, 50)
-        teacher_list.add(tea)
+    # background, princess and walls only move with the camera, they are
+    # drawn again only when the view scrolls
+    view = GameView(size, main_maze.grid, player,
+                    [(xiaoxiao_image,
+                      (main_maze.grid.exit[1] * ROAD_THICKNESS,
+                       main_maze.grid.exit[0] * ROAD_THICKNESS))])
 
-    clock = pygame.time.Clock()
+    # Teacher Section
+    for teacher_id in add_teachers(state, teacher_cells):
+        view.add_teacher(teacher_id)
 
     # --------- BGM Loaded --------- #
-    pygame.mixer.music.load(BACKGROUND_MUSIC_PATH)
     pygame.mixer.music.play()
 
-    # --------- Figure Loaded --------- #
-    xiaoxiao_image = pygame.image.load(PRINCESS_IMAGE_PATH).convert()
-
-    # --------- Question Loaded --------- #
-    wb = load_workbook(filename=QUESTION_WORKBOOK_PATH)
-    ws = wb.get_sheet_by_name('Sheet1')
-
-    # welcome
-    welcome(screen)
-
     # --------- Main Loop --------- #
-    global done
-    global blood
+    hint_path = []
+    hint_ticks = 0
+    show_profile = False
+    # the game rules run TICK_RATE times a second whatever the frame rate,
+    # frames draw the player between the last two ticks
+    stepper = FixedTimestep(TICK_RATE)
+
+    def settle(answer, question):
+        """
+        the answer of a question page
+        """
+        nonlocal hint_path, hint_ticks
+        state.answer(answer == question.answer)
+        if answer == question.answer:
+            answer_right(scenes)
+            hint_path = main_maze.hint(state.player_cell(), HINT_STEPS)
+            hint_ticks = HINT_TICKS
+            audio.play_effect(RIGHT_ANSWER_MUSIC_PATH)
+        else:
+            blood_loss(scenes)
+            audio.play_effect(WRONG_ANSWER_MUSIC_PATH)
+
+    profiler.end_frame()
     while not done:
         # --------- Event --------- #
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 done = True
+            if event.type == pygame.KEYUP and event.key == PROFILE_KEY:
+                show_profile = not show_profile
+        audio.update()  # starts a crossfaded track once it is decoded
+
+        if not scenes:
+            if state.lost:
+                lose(scenes)
+            elif state.won:
+                victory(scenes)
+
+        if scenes:
+            page_frame(events)  # a page has the input
+            continue
 
+        for event in events:
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
-                    player.changespeed(-3, 0)
-                if event.key == pygame.K_RIGHT:
-                    player.changespeed(3, 0)
-                if event.key == pygame.K_UP:
-                    player.changespeed(0, -3)
-                if event.key == pygame.K_DOWN:
-                    player.changespeed(0, 3)
+                if event.key in KEY_DIRECTIONS:
+                    state.press(KEY_DIRECTIONS[event.key])
 
             if event.type == pygame.KEYUP:
-                if event.key == pygame.K_LEFT:
-                    player.changespeed(3, 0)
-                if event.key == pygame.K_RIGHT:
-                    player.changespeed(-3, 0)
-                if event.key == pygame.K_UP:
-                    player.changespeed(0, 3)
-                if event.key == pygame.K_DOWN:
-                    player.changespeed(0, -3)
+                if event.key in KEY_DIRECTIONS:
+                    state.release(KEY_DIRECTIONS[event.key])
                 if event.key == pygame.K_ESCAPE:
                     done = True     # ESC key to quit the game
 
-        # --------- Game Logic --------- #
-        player.move(wall_list_dfs)
-
-        # ask questions
-        question_list = pygame.sprite.spritecollide(player, teacher_list, True)
-        row_rand = random.randrange(1, 21, 1)
-        for row in question_list:
-            player.reset_speed()
-            screen.fill(WARM_GREY)
-            position = ('B' + str(row_rand))
-            font_wb = pygame.font.Font(FONT_PATH, 15)
-            text_wb = font_wb.render(ws[position].value, True, BLACK)
-
-            position_a = ('C' + str(row_rand))
-            font_option_a = pygame.font.Font(FONT_PATH, 15)
-            text_option_a = font_option_a.render(
-                ws[position_a].value, True, BLACK)
-            position_b = ('D' + str(row_rand))
-            font_option_b = pygame.font.Font(FONT_PATH, 15)
-            text_option_b = font_option_b.render(
-                ws[position_b].value, True, BLACK)
-            position_c = ('E' + str(row_rand))
-            font_option_c = pygame.font.Font(FONT_PATH, 15)
-            text_option_c = font_option_c.render(
-                ws[position_c].value, True, BLACK)
-            position_d = ('F' + str(row_rand))
-            font_option_d = pygame.font.Font(FONT_PATH, 15)
-            text_option_d = font_option_d.render(
-                ws[position_d].value, True, BLACK)
-
-            screen.blit(text_wb, [50, 20])
-            screen.blit(text_option_a, [50, 40])
-            screen.blit(text_option_b, [50, 60])
-            screen.blit(text_option_c, [50, 80])
-            screen.blit(text_option_d, [50, 100])
-
-            pygame.display.flip()
-            # test if the answer is true
-            ok = False
-            right_answer = ws[('G'+str(row_rand))].value
-            answer = ' '
-            while not ok:
-                for event in pygame.event.get():
-                    if event.type == pygame.KEYUP:
-                        if event.key == pygame.K_a:
-                            answer = 'A'
-                            ok = True
-                        elif event.key == pygame.K_b:
-                            answer = 'B'
-                            ok = True
-                        elif event.key == pygame.K_c:
-                            answer = 'C'
-                            ok = True
-                        elif event.key == pygame.K_d:
-                            answer = 'D'
-                            ok = True
-                        elif event.key == pygame.K_ESCAPE:
-                            ok = True
-                        else:
-                            ok = False
-            if answer == right_answer:
-                answer_right(screen)
-                # pygame.mixer.music.load(RIGHT_ANSWER_MUSIC_PATH)
-                # pygame.mixer.music.play()
-            else:
-                blood -= 20
-                blood_loss(screen)
-                # pygame.mixer.music.load(WRONG_ANSWER_MUSIC_PATH)
-                # pygame.mixer.music.play()
-
-        if blood <= 0:
-            lose(screen)
+        profiler.lap("events")
 
-        if player.rect.top > SCREEN_HEIGHT - ROAD_THICKNESS \
-                and player.rect.left >= SCREEN_WIDTH - 2 * ROAD_THICKNESS \
-                and player.rect.right <= SCREEN_WIDTH and blood > 0:
-            victory(screen)
+        # --------- Game Logic --------- #
+        for _ in range(stepper.advance(dt / 1000.0)):
+            question_list = state.update()
+            if hint_ticks > 0:
+                hint_ticks -= 1
+
+            # ask questions, the pages show from the next frame
+            for teacher_id in question_list:
+                view.remove_teacher(teacher_id)
+                state.reset_speed()
+                question = question_bank.draw()
+                ask_question(scenes, question,
+                             lambda answer, question=question:
+                             settle(answer, question))
+            if scenes or state.over:
+                stepper.reset()     # the game waits for the pages
+                break
+        profiler.lap("update")
 
         # --------- Game Graphics --------- #
-        screen.fill(WARM_GREY)
-
-        screen.blit(xiaoxiao_image,
-                    (SCREEN_WIDTH - 2 * ROAD_THICKNESS,
-                     SCREEN_HEIGHT-ROAD_THICKNESS))
-
-        wall_list_dfs.draw(screen)
-        teacher_list.draw(screen)
-        movingsprites.draw(screen)
-
-        # text on screen
-        font = pygame.font.SysFont(FONT_PATH, 30)
-        text = font.render("Blood: " + str(blood), True, RED)
-        screen.blit(text, [0, 0])
+        dirty_rects = view.draw(screen, state, camera, stepper.alpha,
+                                hint_path if hint_ticks > 0 else (),
+                                profiler, show_profile)
         # --------- Refresh & Clock Set --------- #
 
-        pygame.display.flip()   # fresh the screen
+        if dirty_rects is None:
+            pygame.display.flip()   # fresh the screen
+        else:
+            pygame.display.update(dirty_rects)
+        profiler.lap("display")
 
-        clock.tick(60)  # the speed that the screen updates
+        dt = tick(FPS)  # caps the frames, not the game speed
+        profiler.lap("idle")
+        profiler.end_frame()
 
     # --------- END of Game --------- #
+    if PROFILE_TRACE_PATH is not None:
+        profiler.dump(PROFILE_TRACE_PATH)
+    audio.stop()
     pygame.quit()
+    clear_font_cache()
+    assets.clear()
 
 
 # ------------------ Debug Statement ------------------ #
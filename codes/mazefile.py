@@ -0,0 +1,201 @@
+# !python3
+# coding=utf-8
+
+"""
+Compact binary maze files for the maze runner game.
+
+A file is a fixed header (size, entry, exit, seed, teacher count), the
+teacher cells, then the h_walls and v_walls of the MazeGrid packed eight
+walls per byte, least significant bit first. A 2000x2000 maze takes about
+1 MB. Large mazes can be generated offline and loaded at startup instead
+of carved on every launch, loading reads the file through mmap.
+
+usage: python mazefile.py out.maze [--rows 500] [--cols 500] [--seed 1]
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import argparse
+import collections
+import mmap
+import os
+import struct
+
+try:
+    import numpy as np
+except ImportError:     # packing falls back to big int conversions
+    np = None
+
+from grid import MazeGrid
+
+# ------------------ Global Variables Definition ------------------ #
+MAGIC = b'MZRN'
+FORMAT_VERSION = 1
+HAS_SEED = 1    # header flag, the seed field is set
+
+# magic, version, flags, rows, cols, entry, exit, seed, teacher count;
+# the seed is unsigned, random.getrandbits(64) seeds fit
+_HEADER = struct.Struct('<4sHHIIIIIIQI')
+SEED_LIMIT = 2 ** 64    # seeds go from 0 to SEED_LIMIT - 1
+_CELL = struct.Struct('<II')
+
+# a loaded maze file, teachers is a list of (row, col)
+SavedMaze = collections.namedtuple('SavedMaze', ['grid', 'teachers', 'seed'])
+
+_TO_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+_FROM_DIGITS = bytes.maketrans(b'01', b'\x00\x01')
+
+
+# ------------------ Function Definition ------------------ #
+def pack_bits(flags):
+    """
+    @param flags: bytearray of 0/1
+    @return: bytes, flag i is bit i % 8 of byte i // 8
+    """
+    if np is not None:
+        return np.packbits(np.frombuffer(bytes(flags), dtype=np.uint8),
+                           bitorder='little').tobytes()
+    if not flags:
+        return b''
+    digits = bytes(flags).translate(_TO_DIGITS)[::-1]
+    return int(digits, 2).to_bytes((len(flags) + 7) // 8, 'little')
+
+
+def unpack_bits(data, count):
+    """
+    @param data: bytes-like written by pack_bits
+    @param count: number of flags
+    @return: bytearray of 0/1
+    """
+    if np is not None:
+        return bytearray(np.unpackbits(
+            np.frombuffer(data, dtype=np.uint8, count=(count + 7) // 8),
+            count=count, bitorder='little').tobytes())
+    if not count:
+        return bytearray()
+    value = int.from_bytes(data[:(count + 7) // 8], 'little')
+    digits = format(value, '0%db' % count)[-count:][::-1]
+    return bytearray(digits.encode('ascii').translate(_FROM_DIGITS))
+
+
+def teacher_cells(state):
+    """
+    @param state: engine.GameState
+    @return: the (row, col) of the top-left corner of every teacher
+    """
+    road = state.road_thickness
+    return [(y // road, x // road) for x, y, _, _ in state.teachers.values()]
+
+
+def dumps(grid, teachers=(), seed=None):
+    """
+    @param grid: the carved MazeGrid
+    @param teachers: (row, col) of every teacher
+    @param seed: int seed the maze was generated from, None if unknown,
+                 0 to SEED_LIMIT - 1
+    @return: the maze file content as bytes
+    """
+    if seed is not None and not 0 <= seed < SEED_LIMIT:
+        raise ValueError("seed %d is out of the 0 to 2**64 - 1 range of "
+                         "maze files" % seed)
+    teachers = list(teachers)
+    parts = [_HEADER.pack(
+        MAGIC, FORMAT_VERSION, HAS_SEED if seed is not None else 0,
+        grid.rows, grid.cols, grid.entry[0], grid.entry[1],
+        grid.exit[0], grid.exit[1], seed or 0, len(teachers))]
+    parts.extend(_CELL.pack(row, col) for row, col in teachers)
+    parts.append(pack_bits(grid.h_walls))
+    parts.append(pack_bits(grid.v_walls))
+    return b''.join(parts)
+
+
+def write(path, data):
+    """
+    write maze file content through a temporary file, so a reader never
+    sees a half written maze
+    @param path: file path
+    @param data: bytes from dumps
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as maze_file:
+        maze_file.write(data)
+    os.replace(temp_path, path)
+
+
+def save(path, grid, teachers=(), seed=None):
+    """
+    write a maze file
+    @param path: file path
+    @param grid: the carved MazeGrid
+    @param teachers: (row, col) of every teacher
+    @param seed: int seed the maze was generated from, None if unknown
+    """
+    write(path, dumps(grid, teachers, seed))
+
+
+def load(path):
+    """
+    read a maze file through mmap, only the wall bits get copied
+    @param path: file path
+    @return: the SavedMaze
+    """
+    with open(path, 'rb') as maze_file:
+        with mmap.mmap(maze_file.fileno(), 0,
+                       access=mmap.ACCESS_READ) as data:
+            if len(data) < _HEADER.size:
+                raise ValueError("%s is not a maze file" % path)
+            (magic, version, flags, rows, cols, entry_row, entry_col,
+             exit_row, exit_col, seed, count) = _HEADER.unpack_from(data)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError("%s is not a maze file of version %d"
+                                 % (path, FORMAT_VERSION))
+
+            offset = _HEADER.size
+            teachers = [_CELL.unpack_from(data, offset + i * _CELL.size)
+                        for i in range(count)]
+            offset += count * _CELL.size
+
+            grid = MazeGrid(rows, cols, (entry_row, entry_col),
+                            (exit_row, exit_col))
+            h_size = (len(grid.h_walls) + 7) // 8
+            v_size = (len(grid.v_walls) + 7) // 8
+            if len(data) < offset + h_size + v_size:
+                raise ValueError("%s is truncated" % path)
+            view = memoryview(data)
+            try:
+                grid.h_walls = unpack_bits(view[offset:offset + h_size],
+                                           len(grid.h_walls))
+                offset += h_size
+                grid.v_walls = unpack_bits(view[offset:offset + v_size],
+                                           len(grid.v_walls))
+            finally:
+                view.release()
+    return SavedMaze(grid, teachers, seed if flags & HAS_SEED else None)
+
+
+def main(argv=None):
+    """
+    generate a maze offline and save it
+    """
+    from engine import new_game
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=12)
+    parser.add_argument("--cols", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--teachers", type=int, default=15)
+    parser.add_argument("--algorithm", default="dfs")
+    args = parser.parse_args(argv)
+
+    state = new_game(args.rows, args.cols, args.seed, args.teachers,
+                     args.algorithm)
+    save(args.path, state.grid, teacher_cells(state), args.seed)
+    print("%s: %dx%d, %d bytes" % (args.path, args.rows, args.cols,
+                                   os.path.getsize(args.path)))
+
+
+# ------------------ Debug Statement ------------------ #
+if __name__ == "__main__":
+    main()
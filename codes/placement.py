@@ -0,0 +1,192 @@
+# !python3
+# coding=utf-8
+
+"""
+Teacher placement for the maze runner game.
+
+Teachers are put on the maze graph rather than on random screen spots.
+The chokepoints of the way out come first: cells on the entry to exit
+path whose removal cuts the maze in two (articulation points), so the
+player cannot walk around them. They are taken evenly spread along the
+path, then any other reachable cell fills the count. Teachers keep a
+minimum distance from each other and from the entry and exit, checked
+through a spatial hash. Everything is linear in the number of cells.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import random
+
+from solver import distance_field
+
+# ------------------ Global Variables Definition ------------------ #
+TEACHER_COUNT = 15
+TEACHER_SPACING = 2     # cells between two teachers, in both directions
+
+
+# ------------------ Class Definition ------------------ #
+
+class SpatialHash(object):
+    """
+    cells bucketed by spacing x spacing blocks, so a spacing test only
+    looks at the 3x3 buckets around a cell
+    """
+
+    def __init__(self, spacing):
+        """
+        constructor init
+        @param spacing: cells closer than that, in both directions, are
+                        too close
+        """
+        self.spacing = max(spacing, 1)
+        self.buckets = {}   # (row // spacing, col // spacing) -> cells
+
+    def add(self, pos):
+        key = (pos[0] // self.spacing, pos[1] // self.spacing)
+        self.buckets.setdefault(key, []).append(pos)
+
+    def too_close(self, pos):
+        """
+        @param pos: (row, col)
+        @return: True if a cell of the hash is closer than spacing
+        """
+        row, col = pos
+        spacing = self.spacing
+        bucket_row = row // spacing
+        bucket_col = col // spacing
+        for key_row in (bucket_row - 1, bucket_row, bucket_row + 1):
+            for key_col in (bucket_col - 1, bucket_col, bucket_col + 1):
+                for other_row, other_col in \
+                        self.buckets.get((key_row, key_col), ()):
+                    if abs(other_row - row) < spacing \
+                            and abs(other_col - col) < spacing:
+                        return True
+        return False
+
+
+# ------------------ Function Definition ------------------ #
+def articulation_points(grid):
+    """
+    iterative Tarjan over the broken walls, linear in cells
+    @param grid: the MazeGrid
+    @return: bytearray, 1 for the cells that disconnect the maze
+    """
+    cells = grid.cells
+    order = [0] * cells     # discovery order, from 1, 0 if not visited
+    low = [0] * cells
+    cut = bytearray(cells)
+    counter = 0
+    for root in range(cells):
+        if order[root]:
+            continue
+        counter += 1
+        order[root] = low[root] = counter
+        root_children = 0
+        stack = [(root, -1, iter(grid.open_neighbors(root)))]
+        while stack:
+            cell, parent, neighbors = stack[-1]
+            for next_cell in neighbors:
+                if not order[next_cell]:
+                    counter += 1
+                    order[next_cell] = low[next_cell] = counter
+                    stack.append((next_cell, cell,
+                                  iter(grid.open_neighbors(next_cell))))
+                    break
+                if next_cell != parent and order[next_cell] < low[cell]:
+                    low[cell] = order[next_cell]
+            else:
+                stack.pop()
+                if parent < 0:
+                    continue
+                if low[cell] < low[parent]:
+                    low[parent] = low[cell]
+                if parent == root:
+                    root_children += 1
+                elif low[cell] >= order[parent]:
+                    cut[parent] = 1
+        if root_children > 1:
+            cut[root] = 1
+    return cut
+
+
+def choose_teacher_cells(grid, count=TEACHER_COUNT,
+                         spacing=TEACHER_SPACING, rng=None):
+    """
+    choose the teacher cells, chokepoints of the way out first
+    @param grid: the carved MazeGrid
+    @param count: number of teachers
+    @param spacing: teachers, entry and exit are at least that many
+                    cells apart in one direction
+    @param rng: random.Random instance ordering the other cells, the
+                random module if None
+    @return: list of (row, col), shorter than count when the maze has
+             no more room
+    """
+    rng = rng if rng is not None else random
+    field = distance_field(grid)
+    distance = field.distance
+    path = field.path_from(grid.entry) or []
+
+    open_walls = grid.wall_table_size() - grid.wall_count()
+    if open_walls == grid.cells - 1 and distance.count(-1) == 0:
+        # a perfect maze, every inner cell of the only way out is one
+        chokepoints = path[1:-1]
+    else:
+        cut = articulation_points(grid)
+        chokepoints = [pos for pos in path if cut[grid.index(pos)]]
+
+    taken = SpatialHash(spacing)
+    taken.add(grid.entry)
+    taken.add(grid.exit)
+    chosen = []
+
+    def take(pos):
+        if not taken.too_close(pos):
+            taken.add(pos)
+            chosen.append(pos)
+        return len(chosen) >= count
+
+    # chokepoints on the path, the evenly spread ones first
+    stride = max(len(chokepoints) // max(count, 1), 1)
+    for pos in chokepoints[stride // 2::stride] + chokepoints:
+        if len(chosen) >= count or take(pos):
+            return chosen
+
+    # then random cells the player can reach, every reachable cell in
+    # random order if random picks keep failing
+    for _ in range(8 * count):
+        cell = rng.randrange(grid.cells)
+        if distance[cell] >= 0 and take(grid.position(cell)):
+            return chosen
+    others = [cell for cell in range(grid.cells) if distance[cell] >= 0]
+    rng.shuffle(others)
+    for cell in others:
+        if take(grid.position(cell)):
+            break
+    return chosen
+
+
+def add_teachers(state, cells, size=(30, 30)):
+    """
+    put a teacher in the middle of every cell
+    @param state: engine.GameState
+    @param cells: list of (row, col)
+    @param size: (width, height) of a teacher
+    @return: the teacher ids
+    """
+    road = state.road_thickness
+    return [state.add_teacher(col * road + (road - size[0]) // 2,
+                              row * road + (road - size[1]) // 2,
+                              size[0], size[1])
+            for row, col in cells]
+
+
+def place_teachers(state, count=TEACHER_COUNT, spacing=TEACHER_SPACING,
+                   rng=None, size=(30, 30)):
+    """
+    choose the teacher cells of the state maze and add the teachers
+    @return: the teacher ids
+    """
+    cells = choose_teacher_cells(state.grid, count, spacing, rng)
+    return add_teachers(state, cells, size)
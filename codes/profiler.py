@@ -0,0 +1,159 @@
+# !python3
+# coding=utf-8
+
+"""
+Frame-time instrumentation for the maze runner game.
+
+Phases of the main loop are timed as named spans, lapped one after the
+other. The last frames of every span are kept for rolling averages and
+percentiles, shown by the in-game overlay, and every frame can be
+recorded for a CSV or JSON trace dump. One-off startup jobs are reported
+by the startup Loader instead. Cheap enough to stay on in a normal
+build, no pygame needed.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import collections
+import csv
+import json
+import time
+
+# ------------------ Global Variables Definition ------------------ #
+WINDOW = 120    # frames kept for the rolling statistics
+FRAME = "frame"     # span of a whole frame, end_frame() to end_frame()
+
+
+# ------------------ Class Definition ------------------ #
+
+class FrameProfiler(object):
+    """
+    rolling timings of named spans, in seconds
+    """
+
+    def __init__(self, window=WINDOW, trace=False):
+        """
+        constructor init
+        @param window: frames kept for the rolling statistics
+        @param trace: keep every frame for dump()
+        """
+        self.window = window
+        self.samples = {}   # span name -> deque of the last durations
+        self.current = {}   # span name -> duration in the current frame
+        self.frames = 0
+        self.trace = [] if trace else None
+        self._frame_start = None
+        self._lap_start = time.perf_counter()
+
+    def add(self, name, seconds):
+        """
+        add to the span name of the current frame
+        @param name: span name
+        @param seconds: duration
+        """
+        self.current[name] = self.current.get(name, 0.0) + seconds
+
+    def lap(self, name):
+        """
+        add the time since the last lap (or frame end) to the span name,
+        for phases that run one after the other
+        @param name: span name
+        """
+        now = time.perf_counter()
+        self.add(name, now - self._lap_start)
+        self._lap_start = now
+
+    def end_frame(self):
+        """
+        close the current frame, its spans go to the rolling statistics
+        """
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.current[FRAME] = now - self._frame_start
+        self._frame_start = now
+        self._lap_start = now
+
+        for name, seconds in self.current.items():
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = collections.deque(maxlen=self.window)
+                self.samples[name] = samples
+            samples.append(seconds)
+        if self.trace is not None:
+            self.trace.append((self.frames, self.current))
+        self.current = {}
+        self.frames += 1
+
+    def average(self, name):
+        """
+        @return: mean seconds of the span over the window, 0 if unseen
+        """
+        samples = self.samples.get(name)
+        return sum(samples) / len(samples) if samples else 0.0
+
+    def percentile(self, name, percent):
+        """
+        @param percent: 0 to 100
+        @return: seconds of the span at that percentile over the window
+        """
+        samples = sorted(self.samples.get(name, ()))
+        if not samples:
+            return 0.0
+        return samples[min(int(len(samples) * percent / 100.0),
+                           len(samples) - 1)]
+
+    @property
+    def fps(self):
+        frame = self.average(FRAME)
+        return 1.0 / frame if frame else 0.0
+
+    def summary(self):
+        """
+        @return: {span name: {avg_ms, p50_ms, p95_ms, p99_ms, max_ms}}
+        """
+        return {name: {
+            "avg_ms": self.average(name) * 1000,
+            "p50_ms": self.percentile(name, 50) * 1000,
+            "p95_ms": self.percentile(name, 95) * 1000,
+            "p99_ms": self.percentile(name, 99) * 1000,
+            "max_ms": max(samples) * 1000,
+        } for name, samples in self.samples.items()}
+
+    def lines(self):
+        """
+        @return: the overlay text, one line per span
+        """
+        lines = ["FPS %.1f" % self.fps]
+        for name in sorted(self.samples):
+            lines.append("%-8s %6.2f ms  p95 %6.2f ms" % (
+                name, self.average(name) * 1000,
+                self.percentile(name, 95) * 1000))
+        return lines
+
+    def dump(self, path):
+        """
+        write the recorded frames, CSV (one row per frame, ms per span)
+        or JSON (summary and frames) by the file extension
+        @param path: .csv or .json file path
+        """
+        frames = self.trace or []
+        if path.endswith(".json"):
+            with open(path, "w") as trace_file:
+                json.dump({
+                    "summary": self.summary(),
+                    "frames": [dict({name + "_ms": seconds * 1000
+                                     for name, seconds in spans.items()},
+                                    frame=index)
+                               for index, spans in frames],
+                }, trace_file, indent=1)
+            return
+
+        names = sorted({name for _, spans in frames for name in spans})
+        with open(path, "w", newline="") as trace_file:
+            writer = csv.writer(trace_file)
+            writer.writerow(["frame"] + [name + "_ms" for name in names])
+            for index, spans in frames:
+                writer.writerow([index] + ["%.3f" % (spans[name] * 1000)
+                                           if name in spans else ""
+                                           for name in names])
@@ -0,0 +1,138 @@
+# !python3
+# coding=utf-8
+
+"""
+Question bank for the maze runner game.
+
+The xlsx workbook is imported once into a pickle cache next to it and
+only imported again when the workbook changes, so a normal start never
+pays for openpyxl. Questions are drawn at random without replacement.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import collections
+import os
+import pickle
+import random
+
+# ------------------ Global Variables Definition ------------------ #
+CACHE_VERSION = 1   # bump when the cached layout changes
+
+# one workbook row: A subject, B question, C-F options A-D, G answer
+Question = collections.namedtuple(
+    'Question', ['subject', 'text', 'options', 'answer'])
+
+
+# ------------------ Function Definition ------------------ #
+def read_workbook(path, sheet='Sheet1'):
+    """
+    import the questions from the xlsx workbook with openpyxl
+    @param path: workbook path
+    @param sheet: sheet name
+    @return: list of Question
+    """
+    from openpyxl import load_workbook  # only needed to rebuild the cache
+
+    wb = load_workbook(filename=path, read_only=True)
+    try:
+        subject = None
+        questions = []
+        for row in wb[sheet].iter_rows(min_col=1, max_col=7,
+                                       values_only=True):
+            row = tuple(row) + (None,) * (7 - len(row))
+            if row[0] is not None:  # merged subject cells are empty below
+                subject = row[0]
+            if row[1] is None:
+                continue
+            questions.append(Question(
+                subject, str(row[1]),
+                tuple('' if cell is None else str(cell) for cell in row[2:6]),
+                None if row[6] is None else str(row[6]).strip()))
+    finally:
+        wb.close()
+    return questions
+
+
+def cache_path_for(path):
+    """
+    @param path: workbook path
+    @return: the cache file used for that workbook
+    """
+    return os.path.splitext(path)[0] + '.pickle'
+
+
+# ------------------ Class Definition ------------------ #
+
+class QuestionBank(object):
+    """
+    questions drawn at random without replacement, the bank starts over
+    once every question has been asked
+    """
+
+    def __init__(self, questions, rng=None):
+        """
+        constructor init
+        @param questions: list of Question
+        @param rng: random.Random instance, the random module if None
+        """
+        self.questions = list(questions)
+        self.rng = rng if rng is not None else random
+        self._order = list(range(len(self.questions)))
+        self._left = len(self._order)   # questions not drawn this round
+
+    @classmethod
+    def load(cls, path, cache_path=None, sheet='Sheet1', rng=None):
+        """
+        load the bank from its cache, rebuilding the cache from the
+        workbook when the workbook has changed since
+        @param path: workbook path
+        @param cache_path: cache file, next to the workbook if None
+        @param sheet: sheet name
+        @param rng: random.Random instance
+        @return: the QuestionBank
+        """
+        if cache_path is None:
+            cache_path = cache_path_for(path)
+        stat = os.stat(path)
+        stamp = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size, sheet)
+
+        try:
+            with open(cache_path, 'rb') as cache_file:
+                cached_stamp, rows = pickle.load(cache_file)
+            if cached_stamp == stamp:
+                return cls([Question(*row) for row in rows], rng)
+        except (OSError, EOFError, ValueError, TypeError,
+                pickle.UnpicklingError):
+            pass    # missing or broken cache, rebuild it
+
+        questions = read_workbook(path, sheet)
+        temp_path = cache_path + '.tmp'
+        try:
+            with open(temp_path, 'wb') as cache_file:
+                pickle.dump((stamp, [tuple(q) for q in questions]),
+                            cache_file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            print("question cache error!" + str(Exception) + str(e))
+        return cls(questions, rng)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def draw(self):
+        """
+        a random question not asked yet in this round, one step of a
+        Fisher-Yates shuffle so a draw is O(1) for any bank size
+        @return: the Question
+        """
+        if not self.questions:
+            raise IndexError("the question bank is empty")
+        if not self._left:
+            self._left = len(self._order)
+        pick = self.rng.randrange(0, self._left)
+        self._left -= 1
+        order = self._order
+        order[pick], order[self._left] = order[self._left], order[pick]
+        return self.questions[order[self._left]]
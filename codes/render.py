@@ -0,0 +1,194 @@
+# !python3
+# coding=utf-8
+
+"""
+Rendering helpers for the maze runner game.
+
+The background, the princess and the walls are drawn by draw_view into
+a screen-sized static layer, through a camera that culls them to the
+cells inside the view. The game draws that layer again only when the
+camera scrolls or a wall changes, and between those frames it restores
+and redraws only the areas that the moving sprites and the HUD touch.
+maze_image draws a whole maze into one image. With numpy, the walls are
+turned into a pixel mask in one vectorized pass and written through
+surfarray instead of one fill per wall.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import pygame
+
+try:
+    import numpy as np
+except ImportError:     # walls are filled one by one
+    np = None
+
+from collision import wall_rect
+
+# ------------------ Global Variables Definition ------------------ #
+MASK_MIN_CELLS = 1000   # fewer cells in view are faster filled one by one
+
+
+# ------------------ Function Definition ------------------ #
+def wall_arrays(grid):
+    """
+    numpy views of the wall flags, no copy, so they follow the grid
+    @param grid: the MazeGrid
+    @return: (h_walls as rows-1 x cols, v_walls as rows x cols-1) bool
+    """
+    h_walls = np.frombuffer(grid.h_walls, dtype=np.bool_)
+    v_walls = np.frombuffer(grid.v_walls, dtype=np.bool_)
+    return (h_walls.reshape(grid.rows - 1, grid.cols),
+            v_walls.reshape(grid.rows, grid.cols - 1))
+
+
+def wall_mask(grid, road_thickness, wall_thickness, x, y, width, height):
+    """
+    the wall pixels of a window of the maze, one vectorized pass
+    @param grid: the MazeGrid
+    @param road_thickness: cell size in pixels
+    @param wall_thickness: wall width in pixels, centered on the edge,
+                           at most road_thickness
+    @param x: world x of the left of the window
+    @param y: world y of the top of the window
+    @param width: window width in pixels
+    @param height: window height in pixels
+    @return: bool array indexed [x, y] like surfarray, True on a wall
+    """
+    h_walls, v_walls = wall_arrays(grid)
+    rows = grid.rows
+    cols = grid.cols
+    half = wall_thickness // 2
+    xs = np.arange(x, x + width)
+    ys = np.arange(y, y + height)
+
+    # the cell of every pixel column/row, and the edge a wall there is on
+    col = xs // road_thickness
+    row = ys // road_thickness
+    edge_col = (xs + half) // road_thickness - 1     # wall right of it
+    edge_row = (ys + half) // road_thickness - 1     # wall under it
+    in_v = ((xs + half) % road_thickness < wall_thickness) \
+        & (edge_col >= 0) & (edge_col < cols - 1)
+    in_h = ((ys + half) % road_thickness < wall_thickness) \
+        & (edge_row >= 0) & (edge_row < rows - 1)
+    # the window part inside the maze
+    x_first = min(max(-x, 0), width)
+    x_last = max(min(cols * road_thickness - x, width), x_first)
+    y_first = min(max(-y, 0), height)
+    y_last = max(min(rows * road_thickness - y, height), y_first)
+
+    # only the pixel rows and columns crossing a wall band are gathered
+    mask = np.zeros((height, width), dtype=np.bool_)
+    band = np.flatnonzero(in_h)
+    if band.size:
+        mask[band, x_first:x_last] = h_walls[
+            edge_row[band][:, None], col[None, x_first:x_last]]
+    band = np.flatnonzero(in_v)
+    if band.size:
+        mask[y_first:y_last, band] |= v_walls[
+            row[y_first:y_last, None], edge_col[None, band]]
+    return mask.T
+
+
+def fill_mask(surface, mask, color):
+    """
+    set the pixels of a surface where the mask is True
+    @param surface: surface of the mask size
+    @param mask: bool array indexed [x, y]
+    @param color: fill color
+    @return: surface
+    """
+    if surface.get_bytesize() == 3:     # no 2d pixel view of 24 bit
+        pixels = pygame.surfarray.pixels3d(surface)
+        pixels[mask] = color[:3]
+    else:
+        pixels = pygame.surfarray.pixels2d(surface)
+        pixels[mask] = surface.map_rgb(color)
+    del pixels  # unlock the surface
+    return surface
+
+
+def maze_image(grid, road_thickness, wall_thickness, background,
+               wall_color):
+    """
+    the whole maze as one surface, for level previews and minimaps,
+    pick a small road_thickness for a large maze
+    @return: the surface
+    """
+    image = pygame.Surface((grid.cols * road_thickness,
+                            grid.rows * road_thickness))
+    image.fill(background)
+    return draw_walls(image, grid, road_thickness, wall_thickness,
+                      wall_color)
+
+
+def draw_walls(surface, grid, road_thickness, wall_thickness, color):
+    """
+    draw every standing wall of the grid
+    @param surface: the surface to draw on
+    @param grid: the MazeGrid
+    @param road_thickness: cell size in pixels
+    @param wall_thickness: wall width in pixels
+    @param color: wall color
+    @return: surface
+    """
+    if np is not None and wall_thickness <= road_thickness:
+        width, height = surface.get_size()
+        return fill_mask(surface, wall_mask(grid, road_thickness,
+                                            wall_thickness, 0, 0,
+                                            width, height), color)
+    for _, mode, row, col in grid.standing_walls():
+        surface.fill(color, wall_rect(mode, row, col,
+                                      road_thickness, wall_thickness))
+    return surface
+
+
+def draw_view(surface, grid, camera, road_thickness, wall_thickness,
+              background, wall_color, images=()):
+    """
+    draw the part of the maze the camera sees, only the walls of the
+    visible cells are looked at, so the cost does not grow with the maze
+    @param surface: the screen-sized surface to draw on
+    @param grid: the MazeGrid
+    @param camera: the Camera
+    @param road_thickness: cell size in pixels
+    @param wall_thickness: wall width in pixels
+    @param background: background color
+    @param wall_color: wall color
+    @param images: (surface, world position) pairs drawn under the walls
+    @return: surface
+    """
+    surface.fill(background)
+    for image, position in images:
+        if camera.visible(position[0], position[1],
+                          image.get_width(), image.get_height()):
+            surface.blit(image, camera.to_screen(*position))
+
+    cols = grid.cols
+    row_first, row_last, col_first, col_last = camera.visible_cells(
+        road_thickness, grid.rows, cols)
+    if np is not None and wall_thickness <= road_thickness \
+            and (row_last - row_first + 1) * (col_last - col_first + 1) \
+            >= MASK_MIN_CELLS:
+        width, height = surface.get_size()
+        return fill_mask(surface, wall_mask(grid, road_thickness,
+                                            wall_thickness, camera.x,
+                                            camera.y, width, height),
+                         wall_color)
+
+    # fill() does not shrink a rect hanging over the top-left edge, clip
+    bounds = surface.get_rect()
+    for row in range(row_first, row_last + 1):
+        for col in range(col_first, col_last + 1):
+            if row < grid.rows - 1 and grid.h_walls[row * cols + col]:
+                x, y, width, height = wall_rect(
+                    1, row, col, road_thickness, wall_thickness)
+                surface.fill(wall_color, bounds.clip(
+                    (x - camera.x, y - camera.y, width, height)))
+            if col < cols - 1 and grid.v_walls[row * (cols - 1) + col]:
+                x, y, width, height = wall_rect(
+                    2, row, col, road_thickness, wall_thickness)
+                surface.fill(wall_color, bounds.clip(
+                    (x - camera.x, y - camera.y, width, height)))
+    return surface
@@ -0,0 +1,136 @@
+# !python3
+# coding=utf-8
+
+"""
+Scene stack for the maze runner game.
+
+Dialogs, intro pages and end screens are scenes ticked by the main loop
+instead of loops of their own. The top scene of the stack takes the
+events, waits are timers counted in frame time, so the main loop keeps
+its frame clock (and the CPU sleeps) while a page is shown.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import pygame
+
+
+# ------------------ Class Definition ------------------ #
+
+class Scene(object):
+    """
+    one state of the main loop, override what the scene needs
+    """
+
+    closed = False
+    result = None
+
+    def handle(self, event):
+        """
+        @param event: a pygame event, only the top scene gets them
+        """
+
+    def update(self, dt):
+        """
+        @param dt: milliseconds since the last frame
+        """
+
+    def draw(self, screen):
+        """
+        @param screen: the display surface
+        @return: list of changed rects, None if the whole screen changed
+        """
+        return []
+
+    def close(self, result=None):
+        self.closed = True
+        self.result = result
+
+
+class PageScene(Scene):
+    """
+    a page drawn once, closed after a time, by a key or by a condition
+    """
+
+    def __init__(self, draw, duration=None, keys=None, on_close=None,
+                 timers=(), until=None):
+        """
+        constructor init
+        @param draw: callable drawing the page on the screen
+        @param duration: milliseconds before the page closes, None to
+                         wait for a key
+        @param keys: {pygame key: result}, a key up closes the page with
+                     that result
+        @param on_close: callable taking the result, called once the page
+                         is off the stack, it may push the next scenes
+        @param timers: (milliseconds, callable) called once that long
+                       after the page showed up
+        @param until: callable, the page closes once it returns True
+        """
+        self.draw_page = draw
+        self.duration = duration
+        self.keys = keys or {}
+        self.on_close = on_close
+        self.timers = sorted(timers, key=lambda timer: timer[0])
+        self.until = until
+        self.elapsed = 0
+        self.drawn = False
+
+    def handle(self, event):
+        if event.type == pygame.KEYUP and event.key in self.keys:
+            self.close(self.keys[event.key])
+
+    def update(self, dt):
+        self.elapsed += dt
+        while self.timers and self.timers[0][0] <= self.elapsed:
+            self.timers.pop(0)[1]()
+        if self.duration is not None and self.elapsed >= self.duration:
+            self.close()
+        elif self.until is not None and self.until():
+            self.close()
+
+    def draw(self, screen):
+        if self.drawn:
+            return []   # the page is still on the screen
+        self.drawn = True
+        self.draw_page(screen)
+        return None
+
+
+class SceneStack(object):
+    """
+    the scenes shown over the game, the top one is active
+    """
+
+    def __init__(self):
+        self.scenes = []
+
+    def __bool__(self):
+        return bool(self.scenes)
+
+    def push(self, *scenes):
+        """
+        push scenes, the first one ends on top and shows first
+        """
+        self.scenes.extend(reversed(scenes))
+
+    def tick(self, events, dt, screen):
+        """
+        run one frame of the top scene
+        @param events: the pygame events of the frame
+        @param dt: milliseconds since the last frame
+        @param screen: the display surface
+        @return: list of changed rects, None if the whole screen changed
+        """
+        scene = self.scenes[-1]
+        for event in events:
+            scene.handle(event)
+        if not scene.closed:
+            scene.update(dt)
+        if scene.closed:
+            self.scenes.remove(scene)
+            if getattr(scene, 'on_close', None) is not None:
+                scene.on_close(scene.result)
+            return []
+        return scene.draw(screen)
@@ -0,0 +1,356 @@
+# !python3
+# coding=utf-8
+
+"""
+Maze solvers for the maze runner game.
+
+Every solver works on a grid.MazeGrid and returns a path as a list of
+(row, col) from start to goal, or None if the goal cannot be reached.
+A DistanceField is computed once per maze and target, after that the
+next step toward the target is a single lookup. When a wall is built or
+broken, the field is updated in place, and only the cells whose distance
+changes are visited.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import heapq
+import weakref
+from array import array
+
+# ------------------ Global Variables Definition ------------------ #
+# grid -> {target: field}, the fields only keep a weak reference to
+# their grid, so an entry goes away with its grid
+_field_cache = weakref.WeakKeyDictionary()
+# a wall cutting off more than 1 / REBUILD_SHARE of the cells from their
+# shortest way rebuilds the field, cheaper than settling them again
+REBUILD_SHARE = 2
+
+
+# ------------------ Class Definition ------------------ #
+
+class DistanceField(object):
+    """
+    breadth-first distances from every cell to one target cell
+    """
+
+    def __init__(self, grid, target=None):
+        """
+        constructor init, one bfs from the target over the whole grid
+        @param grid: the MazeGrid
+        @param target: (row, col), the exit if None
+        """
+        self._grid = weakref.ref(grid)
+        self.version = grid.version
+        self.target = tuple(grid.exit if target is None else target)
+        self._fill()
+
+    @property
+    def grid(self):
+        """
+        the MazeGrid of the field, None once it is gone
+        """
+        return self._grid()
+
+    def _fill(self):
+        """
+        one bfs from the target over the whole grid
+        """
+        grid = self.grid
+        # distance[cell]: steps to the target, -1 if it cannot be reached
+        self.distance = array('i', [-1]) * grid.cells
+        # toward[cell]: the next cell on a shortest path to the target
+        self.toward = array('i', [-1]) * grid.cells
+
+        target_cell = grid.index(self.target)
+        self.distance[target_cell] = 0
+        self.toward[target_cell] = target_cell
+        queue = [target_cell]
+        for cell in queue:
+            step = self.distance[cell] + 1
+            for next_cell in grid.open_neighbors(cell):
+                if self.distance[next_cell] < 0:
+                    self.distance[next_cell] = step
+                    self.toward[next_cell] = cell
+                    queue.append(next_cell)
+
+    def update(self, cell1, cell2):
+        """
+        follow a change of the wall between two adjacent cells, the field
+        must be up to date with the grid before that change
+        @param cell1: flat cell index
+        @param cell2: flat cell index
+        """
+        if self.grid.has_wall(cell1, cell2):
+            self._cut(cell1, cell2)
+        else:
+            self._join(cell1, cell2)
+        self.version = self.grid.version
+
+    def _join(self, cell1, cell2):
+        """
+        a wall was broken, distances can only get shorter: a bfs from the
+        far side of it, through the cells it brings closer
+        """
+        distance = self.distance
+        toward = self.toward
+        if distance[cell1] < 0 or 0 <= distance[cell2] < distance[cell1]:
+            cell1, cell2 = cell2, cell1
+        if distance[cell1] < 0 or 0 <= distance[cell2] <= distance[cell1] + 1:
+            return  # no way gets shorter through the new opening
+
+        distance[cell2] = distance[cell1] + 1
+        toward[cell2] = cell1
+        queue = [cell2]
+        for cell in queue:
+            step = distance[cell] + 1
+            for next_cell in self.grid.open_neighbors(cell):
+                if distance[next_cell] < 0 or distance[next_cell] > step:
+                    distance[next_cell] = step
+                    toward[next_cell] = cell
+                    queue.append(next_cell)
+
+    def _cut(self, cell1, cell2):
+        """
+        a wall was built, distances can only get longer, and only for
+        the cells whose way to the target went through it: they are
+        settled again from their neighbors outside that region
+        """
+        distance = self.distance
+        toward = self.toward
+        if toward[cell1] == cell2:
+            child = cell1
+        elif toward[cell2] == cell1:
+            child = cell2
+        else:
+            return  # the shortest ways do not use that wall
+
+        grid = self.grid
+        limit = grid.cells // REBUILD_SHARE
+        region = [child]    # the subtree of child in the toward links
+        inside = {child}
+        border = []     # (cell of the region, open neighbor out of it)
+        for cell in region:
+            for next_cell in grid.open_neighbors(cell):
+                if toward[next_cell] == cell:
+                    inside.add(next_cell)
+                    region.append(next_cell)
+                else:
+                    border.append((cell, next_cell))
+            if len(region) > limit:
+                self._fill()
+                return
+        for cell in region:
+            distance[cell] = -1
+            toward[cell] = -1
+
+        heap = [(distance[next_cell] + 1, cell, next_cell)
+                for cell, next_cell in border
+                if next_cell not in inside and distance[next_cell] >= 0]
+        heapq.heapify(heap)
+        while heap:
+            step, cell, parent = heapq.heappop(heap)
+            if distance[cell] >= 0:
+                continue
+            distance[cell] = step
+            toward[cell] = parent
+            for next_cell in grid.open_neighbors(cell):
+                if next_cell in inside and distance[next_cell] < 0:
+                    heapq.heappush(heap, (step + 1, next_cell, cell))
+
+    def distance_from(self, pos):
+        """
+        @param pos: (row, col)
+        @return: steps from pos to the target, -1 if unreachable
+        """
+        return self.distance[self.grid.index(pos)]
+
+    def next_step(self, pos):
+        """
+        @param pos: (row, col)
+        @return: the (row, col) to go next, None if unreachable
+        """
+        cell = self.toward[self.grid.index(pos)]
+        if cell < 0:
+            return None
+        return self.grid.position(cell)
+
+    def path_from(self, pos, limit=None):
+        """
+        follow the field from pos to the target
+        @param pos: (row, col)
+        @param limit: the most cells to return, None for the whole path
+        @return: list of (row, col) starting at pos, None if unreachable
+        """
+        cell = self.grid.index(pos)
+        if self.toward[cell] < 0:
+            return None
+        target_cell = self.grid.index(self.target)
+        path = [self.grid.position(cell)]
+        while cell != target_cell and (limit is None or len(path) < limit):
+            cell = self.toward[cell]
+            path.append(self.grid.position(cell))
+        return path
+
+
+# ------------------ Function Definition ------------------ #
+def distance_field(grid, target=None):
+    """
+    the cached DistanceField of grid toward target, rebuilt only when
+    the grid has changed since it was computed
+    @param grid: the MazeGrid
+    @param target: (row, col), the exit if None
+    @return: the DistanceField
+    """
+    target = tuple(grid.exit if target is None else target)
+    fields = _field_cache.setdefault(grid, {})
+    field = fields.get(target)
+    if field is None or field.version != grid.version:
+        field = DistanceField(grid, target)
+        fields[target] = field
+    return field
+
+
+def cached_fields(grid):
+    """
+    @param grid: the MazeGrid
+    @return: the DistanceFields cached for grid, one per target
+    """
+    return list(_field_cache.get(grid, {}).values())
+
+
+def _endpoints(grid, start, goal):
+    start = grid.index(grid.entry if start is None else start)
+    goal = grid.index(grid.exit if goal is None else goal)
+    return start, goal
+
+
+def _trace(grid, parent, cell):
+    """
+    walk the parent links back from cell
+    @return: list of (row, col) ending at cell
+    """
+    path = []
+    while cell >= 0:
+        path.append(grid.position(cell))
+        cell = parent[cell]
+    path.reverse()
+    return path
+
+
+def bfs_path(grid, start=None, goal=None):
+    """
+    breadth-first search
+    @param grid: the MazeGrid
+    @param start: (row, col), the entry if None
+    @param goal: (row, col), the exit if None
+    @return: the shortest path, None if unreachable
+    """
+    start, goal = _endpoints(grid, start, goal)
+    parent = array('i', [-2]) * grid.cells
+    parent[start] = -1
+    queue = [start]
+    for cell in queue:
+        if cell == goal:
+            return _trace(grid, parent, goal)
+        for next_cell in grid.open_neighbors(cell):
+            if parent[next_cell] == -2:
+                parent[next_cell] = cell
+                queue.append(next_cell)
+    return None
+
+
+def astar_path(grid, start=None, goal=None):
+    """
+    a* search with the manhattan distance as heuristic
+    @param grid: the MazeGrid
+    @param start: (row, col), the entry if None
+    @param goal: (row, col), the exit if None
+    @return: the shortest path, None if unreachable
+    """
+    start, goal = _endpoints(grid, start, goal)
+    cols = grid.cols
+    goal_row, goal_col = divmod(goal, cols)
+    parent = array('i', [-2]) * grid.cells
+    cost = array('i', [-1]) * grid.cells
+    parent[start] = -1
+    cost[start] = 0
+
+    row, col = divmod(start, cols)
+    heap = [(abs(row - goal_row) + abs(col - goal_col), 0, start)]
+    while heap:
+        _, steps, cell = heapq.heappop(heap)
+        if cell == goal:
+            return _trace(grid, parent, goal)
+        if steps > cost[cell]:
+            continue    # a shorter way to cell was queued later
+        steps += 1
+        for next_cell in grid.open_neighbors(cell):
+            if cost[next_cell] < 0 or steps < cost[next_cell]:
+                cost[next_cell] = steps
+                parent[next_cell] = cell
+                row, col = divmod(next_cell, cols)
+                heapq.heappush(heap, (
+                    steps + abs(row - goal_row) + abs(col - goal_col),
+                    steps, next_cell))
+    return None
+
+
+def bidirectional_bfs_path(grid, start=None, goal=None):
+    """
+    breadth-first search from both ends, expanding the smaller frontier
+    one whole level at a time
+    @param grid: the MazeGrid
+    @param start: (row, col), the entry if None
+    @param goal: (row, col), the exit if None
+    @return: the shortest path, None if unreachable
+    """
+    start, goal = _endpoints(grid, start, goal)
+    parent_start = array('i', [-2]) * grid.cells
+    parent_goal = array('i', [-2]) * grid.cells
+    depth_start = array('i', [-1]) * grid.cells
+    depth_goal = array('i', [-1]) * grid.cells
+    parent_start[start] = parent_goal[goal] = -1
+    depth_start[start] = depth_goal[goal] = 0
+    frontier_start = [start]
+    frontier_goal = [goal]
+
+    meet = start if start == goal else -1
+    while meet < 0 and frontier_start and frontier_goal:
+        from_start = len(frontier_start) <= len(frontier_goal)
+        if from_start:
+            frontier, parent, depth, other = \
+                frontier_start, parent_start, depth_start, depth_goal
+        else:
+            frontier, parent, depth, other = \
+                frontier_goal, parent_goal, depth_goal, depth_start
+
+        best = -1
+        next_frontier = []
+        for cell in frontier:
+            for next_cell in grid.open_neighbors(cell):
+                if depth[next_cell] >= 0:
+                    continue
+                parent[next_cell] = cell
+                depth[next_cell] = depth[cell] + 1
+                next_frontier.append(next_cell)
+                # the two searches met, keep the shortest meeting point
+                if other[next_cell] >= 0 and \
+                        (best < 0 or other[next_cell] < best):
+                    best = other[next_cell]
+                    meet = next_cell
+
+        if from_start:
+            frontier_start = next_frontier
+        else:
+            frontier_goal = next_frontier
+
+    if meet < 0:
+        return None
+    path = _trace(grid, parent_start, meet)
+    cell = parent_goal[meet]
+    while cell >= 0:
+        path.append(grid.position(cell))
+        cell = parent_goal[cell]
+    return path
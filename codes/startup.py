@@ -0,0 +1,99 @@
+# !python3
+# coding=utf-8
+
+"""
+Startup pipeline of the maze runner game.
+
+The window and the first intro page come up right away. The slow parts
+of the startup (maze generation, teacher placement, questions, images,
+music) run as jobs on background threads while the intro is read, and
+the game picks their results up once the intro is over. The launch clock
+starts when this module is imported, so import it before pygame to
+count the pygame import in the time to first frame.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+# ------------------ Lib Import ------------------ #
+import threading
+import time
+
+# ------------------ Global Variables Definition ------------------ #
+LAUNCH_TIME = time.perf_counter()
+
+
+# ------------------ Function Definition ------------------ #
+def since_launch():
+    """
+    @return: seconds since the game was launched
+    """
+    return time.perf_counter() - LAUNCH_TIME
+
+
+# ------------------ Class Definition ------------------ #
+
+class Loader(object):
+    """
+    named jobs run on daemon threads, their results are picked up later
+    """
+
+    def __init__(self):
+        """
+        constructor init
+        """
+        self.threads = {}   # job name -> Thread, in start order
+        self.results = {}   # job name -> return value
+        self.errors = {}    # job name -> exception raised
+        self.times = {}     # job name -> seconds the job ran
+
+    def start(self, name, func, *args, **kwargs):
+        """
+        run func(*args, **kwargs) on a new thread
+        @param name: job name
+        @param func: the job, it must not touch the display surface
+        """
+        def run():
+            time_start = time.perf_counter()
+            try:
+                self.results[name] = func(*args, **kwargs)
+            except Exception as e:
+                self.errors[name] = e   # raised again by result()
+            self.times[name] = time.perf_counter() - time_start
+
+        thread = threading.Thread(target=run, name="load-" + name)
+        thread.daemon = True
+        self.threads[name] = thread
+        thread.start()
+
+    def done(self, name=None):
+        """
+        @param name: job name, None for every job
+        @return: True once the job (or every job) has finished
+        """
+        names = [name] if name is not None else list(self.threads)
+        return not any(self.threads[job].is_alive() for job in names)
+
+    def result(self, name):
+        """
+        wait for a job
+        @param name: job name
+        @return: what the job returned, its exception is raised here
+        """
+        self.threads[name].join()
+        if name in self.errors:
+            raise self.errors[name]
+        return self.results.get(name)
+
+    def wait(self):
+        """
+        wait for every job
+        """
+        for thread in list(self.threads.values()):
+            thread.join()
+
+    def report(self):
+        """
+        @return: one line with the time of every finished job
+        """
+        return ", ".join("%s %.0f ms" % (name, self.times[name] * 1000)
+                         for name in self.threads if name in self.times)
@@ -0,0 +1,63 @@
+# !python3
+# coding=utf-8
+
+"""
+Fixed-timestep clock for the maze runner game.
+
+The game rules advance in ticks of a fixed length whatever the frame
+rate: the time of every frame goes into an accumulator, which pays for
+as many whole ticks as it holds. What is left over, as a fraction of a
+tick, tells the renderer how far to interpolate between the last two
+ticks. A slow frame runs more ticks instead of slowing the game down, up
+to max_ticks, so a stall never turns into a catch-up spiral.
+
+@repo: github.com/Spico197/maze_runner
+"""
+
+
+# ------------------ Class Definition ------------------ #
+
+class FixedTimestep(object):
+    """
+    the accumulator turning frame time into fixed ticks
+    """
+
+    def __init__(self, tick_rate=60, max_ticks=5):
+        """
+        constructor init
+        @param tick_rate: ticks per second
+        @param max_ticks: most ticks run for one frame, the rest of a
+                          long stall is dropped
+        """
+        self.step = 1.0 / tick_rate
+        self.max_ticks = max_ticks
+        self.accumulator = 0.0
+
+    def advance(self, seconds):
+        """
+        add the time of a frame
+        @param seconds: time since the last frame
+        @return: the number of ticks to run now
+        """
+        self.accumulator += seconds
+        ticks = int(self.accumulator / self.step)
+        if ticks > self.max_ticks:
+            ticks = self.max_ticks
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= ticks * self.step
+        return ticks
+
+    @property
+    def alpha(self):
+        """
+        @return: 0 to 1, how far the frame is between the last tick and
+                 the next one
+        """
+        return min(self.accumulator / self.step, 1.0)
+
+    def reset(self):
+        """
+        drop the time accumulated, after a pause
+        """
+        self.accumulator = 0.0